@@ -6,17 +6,61 @@
 
 __version__ = "0.6.0"
 
+import asyncio
+import cProfile
+import heapq
+import json
+import logging
+import os
 import re
-
-from datetime import datetime
-from pathlib import PurePath
+import signal
+import threading
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import deepcopy
+from functools import wraps
+from hashlib import sha256
+from itertools import count
+from math import isnan, nan
+from pathlib import Path, PurePath
 from pprint import pformat
 from statistics import fmean
-from sys import version_info
-from typing import Any, Dict, Iterable, List, Optional, Set, Union
+from sys import _current_frames, getprofile, intern, version_info
+from time import perf_counter
+from types import CodeType, FrameType
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import hassapi as hass
 
+from notifreeze_engine import (
+    RECHECK,
+    SEND,
+    STOP,
+    RoomTable,
+    Trend,
+    decide,
+    exceeds,
+    next_check,
+    thresholds,
+)
+
 
 APP_NAME = "NotiFreeze"
 APP_ICON = "❄️ "
@@ -25,10 +69,24 @@ APP_ICON = "❄️ "
 DEFAULT_MAX_DIFFERENCE = 5.0
 DEFAULT_INITIAL = 5
 DEFAULT_REMINDER = 3
+DEFAULT_TICK = 10
+DEFAULT_METRICS_INTERVAL = 60
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_QUEUE_WORKERS = 2
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 2.0
+DEFAULT_LAST_VALID_TTL = 10
+DEFAULT_PROFILE_EVENT = "notifreeze_profile"
+DEFAULT_PROFILE_INTERVAL = 5
 
 KEYWORD_DOOR_WINDOW = "binary_sensor.door_window_"
 KEYWORD_TEMPERATURE = "sensor.temperature_"
 
+# splits entity ids and friendly names into index tokens
+TOKEN_SEPARATOR = re.compile(r"[\W_]+")
+# length of the substrings indexed to find tokens containing an alias token
+GRAM_SIZE = 3
+
 # translations
 MSGS: Dict[str, Dict[str, str]] = {
     "en_US": {
@@ -44,6 +102,22 @@ MSGS: Dict[str, Dict[str, str]] = {
 # helper
 SECONDS_PER_MIN: int = 60
 
+# bounds of the interval (seconds) invalid sensors are logged in, doubled on every log
+QUARANTINE_LOG_MIN = 60
+QUARANTINE_LOG_MAX = 3600
+
+# upper bounds of the callback latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# name of the callback currently measured, used to attribute state lookups
+current_callback: ContextVar[str] = ContextVar("current_callback", default="other")
+
+# app name -> runtime state handed over from `terminate` to the next `initialize` on config reloads
+handoffs: Dict[str, Dict[str, Any]] = {}
+
+# code of the functions sampled while profiling, stacks are cut at the outermost of them
+profiled_code: Set[CodeType] = set()
+
 # version checks
 py3_or_higher = version_info.major >= 3
 py37_or_higher = py3_or_higher and version_info.minor >= 7
@@ -60,20 +134,12 @@ def hl_entity(entity: str) -> str:
     return f"{domain}.{hl(entity)}"
 
 
-async def get_timestring(last_changed: datetime) -> str:
-    # exact state-change time but not relative/readable time
-    last_changed = datetime.fromisoformat(str(last_changed))
-
-    # calculate timedelta
-    opened_ago = datetime.now().astimezone() - last_changed.astimezone()
-
-    opened_ago_min, opened_ago_sec = divmod(
-        (datetime.now().astimezone() - last_changed.astimezone()).total_seconds(),
-        float(SECONDS_PER_MIN),
-    )
+def get_timestring(opened_ago: float) -> str:
+    # seconds since opened as relative/readable time
+    opened_ago_min, opened_ago_sec = divmod(opened_ago, float(SECONDS_PER_MIN))
 
     # append suitable unit
-    if opened_ago.total_seconds() >= SECONDS_PER_MIN:
+    if opened_ago >= SECONDS_PER_MIN:
         if opened_ago_sec < 10 or opened_ago_sec > 50:
             open_since = f"{hl(int(opened_ago_min))}min"
         else:
@@ -84,59 +150,822 @@ async def get_timestring(last_changed: datetime) -> str:
     return open_since
 
 
+class Histogram:
+    """Cumulative latency histogram with fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        # last count is the +Inf bucket
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count * 1e3, 3) if self.count else 0,
+            "max_ms": round(self.max * 1e3, 3),
+        }
+
+
+class Metrics:
+    """Callback latencies and counters, collected only while enabled."""
+
+    def __init__(self) -> None:
+        # callback -> latency histogram
+        self.latency: Dict[str, Histogram] = {}
+        # room -> callback -> latency histogram
+        self.rooms: Dict[str, Dict[str, Histogram]] = {}
+        # (callback, lookup) -> number of state lookups
+        self.lookups: Counter = Counter()
+
+    def observe(self, callback: str, seconds: float, room: Optional[str] = None) -> None:
+        self.latency.setdefault(callback, Histogram()).observe(seconds)
+        if room:
+            self.rooms.setdefault(room, {}).setdefault(callback, Histogram()).observe(seconds)
+
+    def lookup(self, lookup: str) -> None:
+        self.lookups[(current_callback.get(), lookup)] += 1
+
+    def attributes(self, gauges: Dict[str, int]) -> Dict[str, Any]:
+        lookups: Dict[str, Dict[str, int]] = {}
+        for (callback, lookup), number in sorted(self.lookups.items()):
+            lookups.setdefault(callback, {})[lookup] = number
+
+        return {
+            **gauges,
+            "callbacks": {name: hist.summary() for name, hist in sorted(self.latency.items())},
+            "lookups": lookups,
+            "rooms": {
+                room: {name: hist.summary() for name, hist in sorted(callbacks.items())}
+                for room, callbacks in sorted(self.rooms.items())
+            },
+        }
+
+    def prometheus(self, app: str, gauges: Dict[str, int]) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def histogram(name: str, hist: Histogram, labels: str) -> None:
+            cumulative = 0
+            for bound, number in zip([*map(str, hist.buckets), "+Inf"], hist.counts):
+                cumulative += number
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+            lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        name = "notifreeze_callback_duration_seconds"
+        lines += [f"# HELP {name} Duration of NotiFreeze callbacks.", f"# TYPE {name} histogram"]
+        for callback, hist in sorted(self.latency.items()):
+            histogram(name, hist, f'app="{app}",callback="{callback}"')
+
+        name = "notifreeze_room_callback_duration_seconds"
+        lines += [
+            f"# HELP {name} Duration of NotiFreeze callbacks per room.",
+            f"# TYPE {name} histogram",
+        ]
+        for room, callbacks in sorted(self.rooms.items()):
+            for callback, hist in sorted(callbacks.items()):
+                histogram(name, hist, f'app="{app}",room="{room}",callback="{callback}"')
+
+        name = "notifreeze_state_lookups_total"
+        lines += [f"# HELP {name} State lookups per callback.", f"# TYPE {name} counter"]
+        for (callback, lookup), number in sorted(self.lookups.items()):
+            lines.append(f'{name}{{app="{app}",callback="{callback}",lookup="{lookup}"}} {number}')
+
+        for gauge, value in sorted(gauges.items()):
+            name = f"notifreeze_{gauge}"
+            lines += [f"# TYPE {name} gauge", f'{name}{{app="{app}"}} {value}']
+
+        return "\n".join(lines) + "\n"
+
+
+def measured(callback: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Record the latency of a callback if metrics are enabled."""
+
+    @wraps(callback)
+    async def wrapper(self: Any, *args: Any) -> Any:
+        if not self.metrics:
+            return await callback(self, *args)
+
+        # appdaemon passes the callback kwargs last, reminders carry the room in their session
+        kwargs = args[-1] if args and isinstance(args[-1], dict) else {}
+        room = kwargs.get("room") or (session.room if (session := kwargs.get("session")) else None)
+        token = current_callback.set(callback.__name__)
+        started = perf_counter()
+        try:
+            return await callback(self, *args)
+        finally:
+            self.metrics.observe(
+                callback.__name__, perf_counter() - started, room.name if room else None
+            )
+            current_callback.reset(token)
+
+    return wrapper
+
+
+def profiled(callback: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Profile a callback while a profiling run is active."""
+    profiled_code.add(callback.__code__)
+
+    @wraps(callback)
+    async def wrapper(self: Any, *args: Any) -> Any:
+        if not (profiler := self.profiler):
+            return await callback(self, *args)
+
+        with profiler.scope():
+            return await callback(self, *args)
+
+    return wrapper
+
+
+def parse_temperature(state: Any) -> Optional[float]:
+    """Temperature of a sensor state, None for "unavailable", "unknown" and the like."""
+    try:
+        value = float(state)
+    except (TypeError, ValueError):
+        return None
+
+    return None if isnan(value) else value
+
+
+class SensorMean:
+    """Running mean over the latest valid values of a group of sensors."""
+
+    __slots__ = ("sensors", "values", "invalid", "mean", "column", "index")
+
+    def __init__(
+        self, sensors: Set[str], column: Optional["array[float]"] = None, index: int = 0
+    ) -> None:
+        self.sensors: Set[str] = sensors
+        # latest valid value per sensor
+        self.values: Dict[str, float] = {}
+        # latest state of sensors not reporting a number
+        self.invalid: Dict[str, Any] = {}
+        # mean of all valid values, updated on every change
+        self.mean: Optional[float] = None
+        # column the mean is mirrored to, nan if there is no valid value
+        self.column = column
+        self.index = index
+
+    def update(self, sensor: str, state: Any, keep: bool = False) -> Optional[float]:
+        """Store the new state of a sensor and return the updated mean.
+
+        With `keep`, the last valid value of a sensor reporting an invalid state is still used.
+        """
+        if (value := parse_temperature(state)) is not None:
+            self.values[sensor] = value
+            self.invalid.pop(sensor, None)
+        else:
+            self.invalid[sensor] = state
+            if not keep:
+                self.values.pop(sensor, None)
+
+        return self.refresh()
+
+    def expire(self, sensor: str) -> Optional[float]:
+        """Stop using the last valid value of an invalid sensor and return the updated mean."""
+        if sensor in self.invalid:
+            self.values.pop(sensor, None)
+
+        return self.refresh()
+
+    def remove(self, sensor: str) -> Optional[float]:
+        """Stop tracking a sensor and return the updated mean."""
+        self.sensors.discard(sensor)
+        self.values.pop(sensor, None)
+        self.invalid.pop(sensor, None)
+
+        return self.refresh()
+
+    def refresh(self) -> Optional[float]:
+        self.mean = fmean(self.values.values()) if self.values else None
+
+        if self.column is not None:
+            self.column[self.index] = nan if self.mean is None else self.mean
+
+        return self.mean
+
+
+def create_push_data(push: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """Build the ios push settings, ids ending with "-" are suffixed with the given name."""
+    if not push:
+        return {}
+
+    push_data: Dict[str, Any] = {"push": {}, "apns_headers": {}}
+
+    if push.get("badge", False):
+        push_data["push"]["badge"] = 1
+    if thread_id := push.get("thread_id", None):
+        push_data["push"]["thread-id"] = (
+            f"{thread_id}{name}".lower() if thread_id.endswith("-") else thread_id
+        ).lower()
+    if apns_collapse_id := push.get("apns_collapse_id", None):
+        push_data["apns_headers"]["apns-collapse-id"] = (
+            f"{apns_collapse_id}{name}".lower()
+            if apns_collapse_id.endswith("-")
+            else apns_collapse_id
+        ).lower()
+
+    return push_data
+
+
+class SensorIndex:
+    """Token index over entity ids and friendly names of auto-discoverable sensors."""
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        # keyword -> token -> entity ids
+        self.tokens: Dict[str, Dict[str, Set[str]]] = {keyword: {} for keyword in keywords}
+        # keyword -> gram -> tokens containing it
+        self.grams: Dict[str, Dict[str, Set[str]]] = {keyword: {} for keyword in keywords}
+        # entity id -> keyword and tokens the entity is indexed with
+        self.entities: Dict[str, Tuple[str, Set[str]]] = {}
+
+    @staticmethod
+    def tokenize(text: str) -> Set[str]:
+        return set(filter(None, TOKEN_SEPARATOR.split(text.lower())))
+
+    @staticmethod
+    def split(token: str) -> Set[str]:
+        return {token[i : i + GRAM_SIZE] for i in range(len(token) - GRAM_SIZE + 1)}
+
+    def add(self, entity_id: str, friendly_name: Optional[str] = None) -> bool:
+        """(Re-)index an entity, returns whether the index has changed."""
+        if not (keyword := next((kw for kw in self.tokens if kw in entity_id), None)):
+            return False
+
+        entity_id = intern(entity_id)
+        tokens = self.tokenize(f"{entity_id}|{friendly_name or ''}")
+        if self.entities.get(entity_id) == (keyword, tokens):
+            return False
+
+        self.remove(entity_id)
+        self.entities[entity_id] = (keyword, tokens)
+        for token in tokens:
+            if token not in self.tokens[keyword]:
+                for gram in self.split(token):
+                    self.grams[keyword].setdefault(gram, set()).add(token)
+            self.tokens[keyword].setdefault(token, set()).add(entity_id)
+
+        return True
+
+    def remove(self, entity_id: str) -> bool:
+        """Remove an entity from the index, returns whether the index has changed."""
+        if not (indexed := self.entities.pop(entity_id, None)):
+            return False
+
+        keyword, tokens = indexed
+        for token in tokens:
+            if entities := self.tokens[keyword].get(token):
+                entities.discard(entity_id)
+                if not entities:
+                    del self.tokens[keyword][token]
+                    for gram in self.split(token):
+                        self.grams[keyword][gram].discard(token)
+                        if not self.grams[keyword][gram]:
+                            del self.grams[keyword][gram]
+
+        return True
+
+    def find(self, keyword: str, alias: str) -> Set[str]:
+        """Find entities whose id or friendly name contain all tokens of the alias."""
+        tokens = self.tokens.get(keyword, {})
+        grams = self.grams.get(keyword, {})
+        matches: Optional[Set[str]] = None
+
+        for token in self.tokenize(alias):
+            # indexed tokens containing the alias token, e.g. "bath" matches "bath" and "bathroom"
+            if parts := sorted((grams.get(gram, set()) for gram in self.split(token)), key=len):
+                candidates: Iterable[str] = set.intersection(*parts)
+            else:
+                # shorter than a gram, all tokens are candidates
+                candidates = tokens
+            entities = set().union(*[tokens[indexed] for indexed in candidates if token in indexed])
+            matches = entities if matches is None else matches & entities
+
+        return matches or set()
+
+
+class Reminders:
+    """Heap of due reminders, keyed by door/window entity."""
+
+    def __init__(self) -> None:
+        # (due timestamp, sequence number, entity)
+        self.heap: List[Tuple[float, int, str]] = []
+        # entity -> (due timestamp, sequence number, reminder kwargs)
+        self.pending: Dict[str, Tuple[float, int, Dict[str, Any]]] = {}
+        self.sequence = count()
+        # pending reminders or open sessions changed since they were last saved
+        self.dirty = False
+
+    def __contains__(self, entity: str) -> bool:
+        return entity in self.pending
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def schedule(self, entity: str, due: float, **kwargs: Any) -> None:
+        """(Re-)arm the reminder of an entity, replacing a pending one."""
+        sequence = next(self.sequence)
+        self.pending[entity] = (due, sequence, kwargs)
+        heapq.heappush(self.heap, (due, sequence, entity))
+        self.dirty = True
+
+    def cancel(self, entity: str) -> bool:
+        """Cancel the pending reminder of an entity, stale heap entries are skipped lazily."""
+        if self.pending.pop(entity, None) is None:
+            return False
+
+        self.dirty = True
+
+        # drop stale entries once they outnumber the pending reminders
+        if len(self.heap) > 2 * len(self.pending) + 16:
+            self.heap = [(due, seq, entity) for entity, (due, seq, _) in self.pending.items()]
+            heapq.heapify(self.heap)
+
+        return True
+
+    def due(self, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """Remove and return all reminders due at the given timestamp."""
+        due: List[Tuple[str, Dict[str, Any]]] = []
+
+        while self.heap and self.heap[0][0] <= now:
+            _, sequence, entity = heapq.heappop(self.heap)
+            if (reminder := self.pending.get(entity)) and reminder[1] == sequence:
+                del self.pending[entity]
+                due.append((entity, reminder[2]))
+                self.dirty = True
+
+        return due
+
+
+class Quarantine:
+    """Sensors reporting invalid states, logged with exponential back-off."""
+
+    def __init__(self, ttl: float) -> None:
+        # seconds the last valid value of a quarantined sensor is still used
+        self.ttl = ttl
+        # sensor -> [quarantined since, next log timestamp, log interval]
+        self.sensors: Dict[str, List[float]] = {}
+        # quarantined sensors whose last valid value is still used
+        self.kept: Set[str] = set()
+
+    def __contains__(self, sensor: str) -> bool:
+        return sensor in self.sensors
+
+    def __len__(self) -> int:
+        return len(self.sensors)
+
+    def add(self, sensor: str, now: float) -> bool:
+        """Quarantine a sensor or keep it quarantined, returns whether it is due to be logged."""
+        if (entry := self.sensors.get(sensor)) is None:
+            self.sensors[sensor] = [now, now + QUARANTINE_LOG_MIN, QUARANTINE_LOG_MIN]
+            if self.ttl > 0:
+                self.kept.add(sensor)
+            return True
+
+        if now < entry[1]:
+            return False
+
+        entry[2] = min(entry[2] * 2, QUARANTINE_LOG_MAX)
+        entry[1] = now + entry[2]
+        return True
+
+    def release(self, sensor: str) -> Optional[float]:
+        """Release a sensor reporting valid states again, returns since when it was quarantined."""
+        self.kept.discard(sensor)
+        entry = self.sensors.pop(sensor, None)
+        return entry[0] if entry else None
+
+    def expired(self, now: float) -> List[str]:
+        """Sensors whose last valid value must not be used any longer, each returned once."""
+        expired = [sensor for sensor in self.kept if now - self.sensors[sensor][0] >= self.ttl]
+        self.kept.difference_update(expired)
+        return expired
+
+
+class Outbox:
+    """Bounded queue of outgoing notifications, delivered by worker tasks with retries."""
+
+    def __init__(self, app: Any, size: int, retries: int, backoff: float) -> None:
+        self.app = app
+        # keys of the undelivered notifications in order
+        self.queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue(maxsize=size)
+        # (service, apns collapse id or sequence number) -> latest undelivered (message, data)
+        self.pending: Dict[Tuple[str, Any], Tuple[str, Dict[str, Any]]] = {}
+        self.sequence = count()
+        self.retries = retries
+        # seconds before the first retry, doubled on every further one
+        self.backoff = backoff
+        self.workers: List["asyncio.Future[None]"] = []
+        # notifications given up after all retries
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def start(self, workers: int) -> None:
+        self.workers = [self.app.create_task(self.work()) for _ in range(workers)]
+
+    def stop(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+
+    def put(self, service: str, message: str, data: Dict[str, Any]) -> None:
+        """Queue a notification, an undelivered one with the same collapse id is replaced."""
+        collapse_id = data.get("apns_headers", {}).get("apns-collapse-id")
+        key = (service, collapse_id or next(self.sequence))
+
+        if key in self.pending:
+            # superseded, the queued key delivers the latest message
+            self.pending[key] = (message, data)
+            return
+
+        if self.queue.full():
+            # the oldest notification is the most outdated one
+            dropped = self.queue.get_nowait()
+            self.queue.task_done()
+            self.pending.pop(dropped, None)
+            self.app.lg(f"notification queue full, dropped one for {dropped[0]}", level="WARNING")
+
+        self.pending[key] = (message, data)
+        self.queue.put_nowait(key)
+
+    async def work(self) -> None:
+        while True:
+            key = await self.queue.get()
+            try:
+                await self.deliver(key)
+            finally:
+                self.queue.task_done()
+
+    async def deliver(self, key: Tuple[str, Any]) -> None:
+        service = key[0]
+        attempt = 0
+
+        while notification := self.pending.pop(key, None):
+            message, data = notification
+            try:
+                await self.app.call_service(service, message=message, data=data)
+                return
+            except Exception as error:
+                if attempt >= self.retries:
+                    self.failed += 1
+                    self.app.lg(f"{service} failed, notification dropped: {error}", level="ERROR")
+                    return
+
+                delay = self.backoff * 2**attempt
+                attempt += 1
+                self.app.lg(f"{service} failed, retry in {delay}s: {error}", level="WARNING")
+
+                # retried unless a newer notification with the same collapse id is queued meanwhile
+                self.pending.setdefault(key, notification)
+                await asyncio.sleep(delay)
+
+
+class Recorder:
+    """Appends door/window and temperature state changes to a JSONL trace file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # line buffered, every recorded change is written right away
+        self.file = path.open("a", buffering=1)
+
+    def write(self, timestamp: float, entity: str, state: Any, **extra: Any) -> None:
+        line = {"ts": timestamp, "entity_id": entity, "state": state, **extra}
+        self.file.write(json.dumps(line, default=str) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def frame_label(code: CodeType) -> str:
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({Path(code.co_filename).name})"
+
+
+class Profiler:
+    """Profiles the profiled callbacks with cProfile and samples their stacks."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.enabled = False
+        # profiled callbacks currently running
+        self.depth = 0
+
+        # stack of code objects, outermost first -> samples
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+        # created in the event loop thread, which runs all callbacks of the app
+        self.thread = threading.get_ident()
+        self.stopped = threading.Event()
+        self.sampler: Optional[threading.Thread] = None
+
+        if (
+            self.thread == threading.main_thread().ident
+            and hasattr(signal, "setitimer")
+            and signal.getsignal(signal.SIGPROF) == signal.SIG_DFL
+        ):
+            # sampled on cpu time, an idle event loop is not sampled
+            signal.signal(signal.SIGPROF, self.interrupt)
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        else:
+            # sampled on wall time from a thread, samples pile up where the loop releases the GIL
+            self.sampler = threading.Thread(
+                target=self.sample, name="notifreeze-profiler", daemon=True
+            )
+            self.sampler.start()
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        """Run cProfile while at least one profiled callback is running."""
+        self.depth += 1
+        # only one profiler can be active per thread, e.g. another app may be profiling
+        if not self.enabled and not self.stopped.is_set() and getprofile() is None:
+            self.profile.enable()
+            self.enabled = True
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if self.depth == 0 and self.enabled:
+                self.profile.disable()
+                self.enabled = False
+
+    def interrupt(self, signum: int, frame: Optional[FrameType]) -> None:
+        self.record(frame)
+
+    def sample(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.record(_current_frames().get(self.thread))
+
+    def record(self, frame: Optional[FrameType]) -> None:
+        self.samples += 1
+        stack: List[CodeType] = []
+        while frame:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+
+        # only samples within profiled callbacks are kept, without the event loop frames
+        for depth in range(len(stack) - 1, -1, -1):
+            if stack[depth] in profiled_code:
+                self.stacks[tuple(reversed(stack[: depth + 1]))] += 1
+                break
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.sampler:
+            self.sampler.join()
+        else:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+        if self.enabled:
+            self.profile.disable()
+            self.enabled = False
+
+    def write(self, path: Path) -> Tuple[Path, Path]:
+        """Write the cProfile stats and the sampled stacks in collapsed (flamegraph) format."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        stats, folded = path.with_suffix(".prof"), path.with_suffix(".folded")
+        self.profile.dump_stats(stats)
+        folded.write_text(
+            "".join(
+                f"{';'.join(map(frame_label, stack))} {samples}\n"
+                for stack, samples in self.stacks.most_common()
+            )
+        )
+
+        return stats, folded
+
+
+class OutdoorTemperature:
+    """Outdoor mean shared by all NotiFreeze apps of the process using the same sensors."""
+
+    # outdoor sensors -> shared provider
+    providers: Dict[FrozenSet[str], "OutdoorTemperature"] = {}
+
+    def __init__(self, sensors: FrozenSet[str]) -> None:
+        self.sensors = sensors
+        self.temperature = SensorMean(set(sensors))
+        # app name -> subscribed app
+        self.subscribers: Dict[str, Any] = {}
+        # app whose state listeners feed the provider
+        self.owner: Optional[Any] = None
+
+    @classmethod
+    async def subscribe(
+        cls, app: Any, sensors: Iterable[str], states: Dict[str, Dict[str, Any]]
+    ) -> "OutdoorTemperature":
+        """Subscribe an app, the first subscriber feeds the provider."""
+        key = frozenset(sensors)
+        if (provider := cls.providers.get(key)) is None:
+            provider = cls.providers[key] = cls(key)
+
+        provider.subscribers[app.name] = app
+        if provider.owner is None:
+            provider.owner = app
+            await app.feed_outdoor(provider, states)
+
+        return provider
+
+    async def unsubscribe(self, app: Any) -> None:
+        """Unsubscribe an app, another subscriber takes over feeding if needed."""
+        self.subscribers.pop(app.name, None)
+
+        if self.owner is not app:
+            return
+
+        self.owner = None
+        if self.subscribers:
+            self.owner = next(iter(self.subscribers.values()))
+            await self.owner.feed_outdoor(self, {})
+        else:
+            self.providers.pop(self.sensors, None)
+
+    async def update(self, sensor: str, state: Any, keep: bool = False) -> None:
+        """Compute the new mean once and push it to all subscribers if it changed."""
+        previous = self.temperature.mean
+        # e.g. a quarantined sensor whose last valid value is kept does not change the mean
+        if (outdoor := self.temperature.update(sensor, state, keep)) != previous:
+            await self.publish(outdoor)
+
+    async def expire(self, sensor: str) -> None:
+        await self.publish(self.temperature.expire(sensor))
+
+    async def publish(self, outdoor: Optional[float]) -> None:
+        for app in list(self.subscribers.values()):
+            await app.outdoor_updated(outdoor)
+
+
 class Room:
     """Class for keeping track of a room."""
 
+    __slots__ = (
+        "name",
+        "alias",
+        "discover",
+        "door_window",
+        "temperature",
+        "indoor_temperature",
+        "push_data",
+        "table",
+        "index",
+        "open_windows",
+    )
+
     def __init__(
         self,
         name: str,
         door_window: Set[str],
         temperature: Set[str],
         push_data: Optional[Dict[str, Union[str, int]]],
+        table: RoomTable,
+        max_difference: float,
+        alias: Optional[str] = None,
+        discover: FrozenSet[str] = frozenset(),
     ) -> None:
 
         self.name: str = name
+        # name used for auto-discovery
+        self.alias: str = alias or name
+        # keywords of the auto-discovered sensors
+        self.discover: FrozenSet[str] = discover
         # door/window sensors of a room
         self.door_window: Set[str] = door_window
         # temperature sensors of a room
         self.temperature: Set[str] = temperature
-        # reminder notification callback handles
-        self.handles: Dict[str, str] = {}
-        # ios push settings
-        self.push_data: Dict[str, Union[str, int]] = push_data
-
-    async def indoor(self, nf: Any) -> Optional[float]:
-        indoor_temperatures = set()
-        invalid_sensors = {}
+        # ios push settings, shared between rooms with equal settings
+        self.push_data: Dict[str, Union[str, int]] = push_data or {}
+        # numeric state lives in the shared table
+        self.table = table
+        self.index = table.add(max_difference)
+        # cached mean of the temperature sensors, mirrored to the table
+        self.indoor_temperature = SensorMean(temperature, table.indoor, self.index)
+        # session per currently open door/window
+        self.open_windows: Dict[str, "Session"] = {}
+
+    def info(self) -> Dict[str, Any]:
+        """Settings shown in the config overview."""
+        return {
+            "door_window": self.door_window,
+            "temperature": self.temperature,
+            "push_data": self.push_data,
+        }
+
+    @property
+    def max_difference(self) -> float:
+        return self.table.max_difference[self.index]
+
+    def indoor(self) -> Optional[float]:
+        return None if isnan(indoor := self.table.indoor[self.index]) else indoor
+
+    def open(self, entity: str, name: str, now: float, indoor: Optional[float]) -> "Session":
+        """Track an opened door/window."""
+        session = self.open_windows[entity] = Session(entity, self, name, now, indoor)
+        return session
+
+    def close(self, entity: str) -> None:
+        """Track a closed door/window."""
+        self.open_windows.pop(entity, None)
+
+    def move(self, table: RoomTable, max_difference: float) -> None:
+        """Move the numeric state of the room to a new table, e.g. after a config reload."""
+        index = table.add(max_difference)
+        table.indoor[index] = self.table.indoor[self.index]
+
+        self.table, self.index = table, index
+        self.indoor_temperature.column, self.indoor_temperature.index = table.indoor, index
+
+    def difference(self, outdoor: Optional[float]) -> Optional[float]:
+        if outdoor is None or (indoor := self.indoor()) is None:
+            return None
+        return round(outdoor - indoor, 2)
+
+
+class Session:
+    """An open door/window, kept up to date by its own state and temperature events."""
+
+    __slots__ = ("entity", "room", "name", "opened", "initial", "counter", "trend")
 
-        for sensor in self.temperature:
-            try:
-                indoor_temperatures.add(float(await nf.get_state(sensor)))
-            except ValueError:
-                invalid_sensors[sensor] = await nf.get_state(sensor)
-                continue
+    def __init__(
+        self, entity: str, room: Room, name: str, opened: float, initial: Optional[float]
+    ) -> None:
+        self.entity = entity
+        self.room = room
+        # display name, the friendly name without the room name
+        self.name = name
+        self.opened = opened
+        # indoor temperature when opened, the first known one if unknown then
+        self.initial = initial
+        # number of the next reminder
+        self.counter = 1
+        # indoor samples since opened
+        self.trend = Trend()
+        if initial is not None:
+            self.trend.add(opened, initial)
 
-        if indoor_temperatures:
-            return fmean(indoor_temperatures)
 
-        nf.lg(f"{self.name}: No valid values ¯\\_(ツ)_/¯ {invalid_sensors = }")
+class NotiFreeze(hass.Hass):  # type: ignore
+    """Notifies about windows which should be closed."""
 
-        return None
+    # set in initialize if metrics are enabled
+    metrics: Optional[Metrics] = None
+    # lines collected while logging a block
+    log_buffer: Optional[List[str]] = None
+    # set while profiling
+    profiler: Optional[Profiler] = None
 
-    async def difference(self, outdoor: float, nf: Any) -> Optional[float]:
-        return round(outdoor - indoor, 2) if (indoor := await self.indoor(nf)) else None
+    def get_state(self, *args: Any, **kwargs: Any) -> Any:
+        if self.metrics:
+            self.metrics.lookup("get_state")
+        return super().get_state(*args, **kwargs)
 
+    def friendly_name(self, *args: Any, **kwargs: Any) -> Any:
+        if self.metrics:
+            self.metrics.lookup("friendly_name")
+        return super().friendly_name(*args, **kwargs)
 
-class NotiFreeze(hass.Hass):  # type: ignore
-    """Notifies about windows which should be closed."""
+    def logs(self, level: str = "INFO") -> bool:
+        """Check if a line of this level is emitted, guard expensive log fields with it."""
+        return bool(self.get_main_log().isEnabledFor(logging.getLevelName(level)))
 
     def lg(
         self, msg: str, *args: Any, icon: Optional[str] = None, repeat: int = 1, **kwargs: Any
     ) -> None:
-        kwargs.setdefault("ascii_encode", False)
+        if not self.logs(kwargs.get("level", "INFO")):
+            return
+
         message = f"{f'{icon} ' if icon else ' '}{msg}"
+
+        if self.log_buffer is not None:
+            self.log_buffer.extend([message] * repeat)
+            return
+
+        kwargs.setdefault("ascii_encode", False)
         _ = [self.log(message, *args, **kwargs) for _ in range(repeat)]
 
+    @contextmanager
+    def log_block(self) -> Iterator[None]:
+        """Collect all lines logged within the block and write them at once."""
+        self.log_buffer = []
+        try:
+            yield
+        finally:
+            lines, self.log_buffer = self.log_buffer, None
+            if lines:
+                self.log("\n".join(lines), ascii_encode=False)
+
     def listr(
         self, list_or_string: Union[List[str], Set[str], str], entities_exist: bool = True
     ) -> Set[str]:
@@ -151,18 +980,39 @@ class NotiFreeze(hass.Hass):  # type: ignore
                 f"{list_or_string} is of type {type(list_or_string)} and not 'Union[List[str], Set[str], str]'"
             )
 
-        return set(filter(self.entity_exists, entity_list) if entities_exist else entity_list)
+        return set(
+            map(intern, filter(self.entity_exists, entity_list) if entities_exist else entity_list)
+        )
 
-    async def outdoor(self) -> float:
-        return fmean([float(await self.get_state(sensor)) for sensor in self.sensors_outdoor])
+    def outdoor(self) -> Optional[float]:
+        return self.outdoor_provider.temperature.mean
 
     async def initialize(self) -> None:
         """Initialize a room with NotiFreeze."""
-        self.icon = APP_ICON
-
         # get a real dict for the configuration
         self.args = dict(self.args)
 
+        # profiling is switched on/off by an event, parsed first to cover the startup too
+        if profile := self.args.pop("profile", True):
+            profile = profile if isinstance(profile, dict) else {}
+            self.profile_event: Optional[str] = str(profile.get("event", DEFAULT_PROFILE_EVENT))
+            self.profile_dir = (
+                Path(profile["path"]) if "path" in profile else Path(__file__).parent / "profiles"
+            )
+            # sampling interval in milliseconds
+            self.profile_interval = float(profile.get("interval", DEFAULT_PROFILE_INTERVAL)) / 1000
+            if profile.get("startup"):
+                self.profiler = Profiler(self.profile_interval)
+        else:
+            self.profile_event = None
+
+        await self.setup()
+
+    @profiled
+    async def setup(self) -> None:
+        """Set up the rooms, listeners and timers."""
+        self.icon = APP_ICON
+
         # python version check
         if not py38_or_higher:
             icon_alert = "⚠️"
@@ -176,8 +1026,25 @@ class NotiFreeze(hass.Hass):  # type: ignore
         if not py37_or_higher:
             raise ValueError
 
-        # general notification
-        self.notify_service = str(self.args.pop("notify_service")).replace(".", "/")
+        # general notification, one or more notify services
+        notify_service = self.args.pop("notify_service")
+        self.notify_services: List[str] = [
+            str(service).replace(".", "/")
+            for service in ([notify_service] if isinstance(notify_service, str) else notify_service)
+            if service
+        ]
+
+        # notifications are sent from a queue, a slow or failing service does not block callbacks
+        queue: Dict[str, Any] = self.args.pop("queue", {})
+        self.outbox = Outbox(
+            self,
+            size=int(queue.get("size", DEFAULT_QUEUE_SIZE)),
+            retries=int(queue.get("retries", DEFAULT_RETRIES)),
+            backoff=float(queue.get("backoff", DEFAULT_BACKOFF)),
+        )
+        self.queue_workers = int(
+            queue.get("workers", max(DEFAULT_QUEUE_WORKERS, len(self.notify_services)))
+        )
 
         # notify eveb when indoor temperature is not changing
         self.always_notify = bool(self.args.pop("always_notify", False))
@@ -201,107 +1068,187 @@ class NotiFreeze(hass.Hass):  # type: ignore
             self.initial_delay = DEFAULT_INITIAL
             self.reminder_delay = DEFAULT_REMINDER
 
+        # due reminders are checked every tick (seconds)
+        self.tick_interval = int(self.args.pop("tick", DEFAULT_TICK))
+        self.reminders = Reminders()
+
+        # open door/window sessions survive restarts in this file
+        if sessions := self.args.pop("sessions", True):
+            self.sessions_file: Optional[Path] = (
+                Path(sessions)
+                if isinstance(sessions, str)
+                else Path(__file__).parent / f".{self.name}.sessions.json"
+            )
+        else:
+            self.sessions_file = None
+
+        # door/window state changes must hold this many seconds to count
+        self.debounce = float(self.args.pop("debounce", 0))
+        # door/window -> last state passed on to the handler
+        self.contacts: Dict[str, str] = {}
+
+        # invalid sensors are skipped, their last valid value is used for this many minutes
+        self.quarantine = Quarantine(
+            float(self.args.pop("last_valid_ttl", DEFAULT_LAST_VALID_TTL)) * SECONDS_PER_MIN
+        )
+
+        # rooms with open doors/windows by table index, their indoor trends are sampled
+        self.open_rooms: Dict[int, Room] = {}
+        # door/window -> (latest state, timestamp of the latest change) while debouncing
+        self.debouncing: Dict[str, Tuple[str, float]] = {}
+
+        # collect notifications for this many seconds into one digest per notify service
+        self.digest = int(self.args.pop("digest", 0))
+        # notify service -> (room, message) collected for the next digest
+        self.digests: Dict[str, List[Tuple[Room, str]]] = {}
+        # notify service -> timestamp the digest is due
+        self.digests_due: Dict[str, float] = {}
+        self.digest_push_data = create_push_data(self.args.get("push", {}), "digest")
+
+        # record door/window and temperature state changes for offline replay
+        if record := self.args.pop("record", False):
+            self.recorder: Optional[Recorder] = Recorder(
+                Path(record)
+                if isinstance(record, str)
+                else Path(__file__).parent / f".{self.name}.trace.jsonl"
+            )
+        else:
+            self.recorder = None
+
+        # runtime metrics
+        if metrics := self.args.pop("metrics", None):
+            metrics = metrics if isinstance(metrics, dict) else {}
+            self.metrics = Metrics()
+            self.metrics_interval = int(metrics.get("interval", DEFAULT_METRICS_INTERVAL))
+            self.metrics_entity = str(metrics.get("entity", f"sensor.{self.name}_metrics"))
+            self.metrics_file = Path(metrics["prometheus"]) if "prometheus" in metrics else None
+        else:
+            self.metrics = None
+
         # sensors
         self.sensors: Dict[str, Any] = {}
         # outdoor temperature sensors
         self.sensors_outdoor = self.listr(self.args.pop("outdoor"))
 
+        # temperature sensor -> cached means the sensor is part of
+        self.temperature_sensors: Dict[str, List[SensorMean]] = {}
+
+        # door/window -> room, state changes are dispatched through it
+        self.door_windows: Dict[str, Room] = {}
+        # door/window -> friendly name, kept up to date by the reindex listener
+        self.friendly_names: Dict[str, str] = {}
+        # "entity": one listener per door/window, "domain": one for the binary_sensor domain
+        self.listener = str(self.args.pop("listener", "entity"))
+
+        # listener handles
+        self.door_window_listeners: Dict[str, str] = {}
+        self.temperature_listeners: Dict[str, str] = {}
+
         # entity list
         states_sensor = self.get_state(entity_id="sensor")
         states_binary_sensor = self.get_state(entity_id="binary_sensor")
 
+        # resolved rooms are cached in this file while config and entities are unchanged
+        if cache := self.args.pop("cache", True):
+            self.cache_file: Optional[Path] = (
+                Path(cache)
+                if isinstance(cache, str)
+                else Path(__file__).parent / f".{self.name}.rooms.json"
+            )
+        else:
+            self.cache_file = None
+
         # set room(s)
         self.rooms: Dict[str, Room] = {}
+        self.table = RoomTable()
+        # rooms with auto-discovered sensors, including those still lacking sensors
+        self.discoverable: Dict[str, Room] = {}
+        # index of auto-discoverable sensors, built on first use
+        self.index: Optional[SensorIndex] = None
+
+        # state of the previous instance if the config was reloaded
+        handoff = handoffs.pop(self.name, {})
+        previous: Dict[str, Room] = handoff.get("rooms", {})
 
         if rooms := self.args.pop("rooms"):
 
-            push = self.args.get("push", {})
+            states = {**await states_binary_sensor, **await states_sensor}
+            cache_key = self.room_cache_key(rooms, states)
 
-            for room_config in rooms:
+            if (resolved := self.load_room_cache(cache_key)) is None:
+                resolved = self.resolve_rooms(deepcopy(rooms), states)
+                self.save_room_cache(cache_key, resolved)
 
-                room_name: str = str()
+            push = self.args.get("push", {})
+            # equal push settings are shared between rooms
+            push_datas: Dict[str, Dict[str, Any]] = {}
 
-                # door/window sensors of a room
-                door_window: Set[str] = set()
-                # temperature sensors of a room
-                indoor: Set[str] = set()
+            for spec in resolved:
 
-                #  very hacky, needs refactoring
-                if isinstance(room_config, dict):
-                    room_name = room_config.pop("name").capitalize()
-                    room_alias = room_config.pop("alias", room_name)
+                # ios push settings
+                push_data = create_push_data(push, spec["name"])
+                push_data = push_datas.setdefault(repr(push_data), push_data)
 
-                    door_window.update(
-                        self.listr(room_config.pop("door_window", None))
-                        or await self.find_sensors(
-                            KEYWORD_DOOR_WINDOW, room_alias, states=await states_binary_sensor
-                        )
-                    )
-                    indoor.update(
-                        self.listr(room_config.pop("indoor", None))
-                        or await self.find_sensors(
-                            KEYWORD_TEMPERATURE, room_alias, states=await states_sensor
-                        )
+                if (room := previous.get(spec["name"])) and self.unchanged(room, spec, push_data):
+                    # keep the room with its open doors/windows, trends and pending reminders
+                    room.move(self.table, self.max_difference)
+                    self.close_missed(room, states)
+                else:
+                    # create room
+                    room = Room(
+                        name=spec["name"],
+                        door_window=set(map(intern, spec["door_window"])),
+                        temperature=set(map(intern, spec["temperature"])),
+                        push_data=push_data,
+                        table=self.table,
+                        max_difference=self.max_difference,
+                        alias=spec["alias"],
+                        discover=frozenset(spec["discover"]),
                     )
 
-                elif isinstance(room_config, str):
-                    room_name = room_alias = room_config.capitalize()
-                    door_window.update(
-                        await self.find_sensors(
-                            KEYWORD_DOOR_WINDOW, room_alias, states=await states_binary_sensor
-                        )
-                    )
-                    indoor.update(
-                        await self.find_sensors(
-                            KEYWORD_TEMPERATURE, room_alias, states=await states_sensor
-                        )
-                    )
+                if room.discover:
+                    self.discoverable[room.name] = room
 
-                # ios push settings
-                # if push := deepcopy(self.args.get("push", {})):
-                if push:
-                    push_data = {"push": {}, "apns_headers": {}}
-
-                    if push.pop("badge", False):
-                        push_data["push"]["badge"] = 1
-                    if thread_id := push.get("thread_id", None):
-                        push_data["push"]["thread-id"] = (
-                            f"{thread_id}{room_name}".lower()
-                            if thread_id.endswith("-")
-                            else thread_id
-                        ).lower()
-                    if apns_collapse_id := push.get("apns_collapse_id", None):
-                        push_data["apns_headers"]["apns-collapse-id"] = (
-                            f"{apns_collapse_id}{room_name}".lower()
-                            if apns_collapse_id.endswith("-")
-                            else apns_collapse_id
-                        ).lower()
+                if room.door_window and room.temperature:
+                    self.rooms[room.name] = room
 
-                else:
-                    push_data = {}
-
-                # create room
-                room = Room(
-                    name=room_name,
-                    door_window=self.listr(door_window),
-                    temperature=self.listr(indoor),
-                    push_data=push_data,
-                )
+            if self.listener == "domain":
+                await self.listen_state(self.dispatch, entity="binary_sensor")
 
-                # create state listener for all door/window sensors
-                if room.door_window and room.temperature:
-                    for entity in room.door_window:
-                        if self.entity_exists(entity):
-                            await self.listen_state(self.handler, entity=entity, room=room)
-                else:
-                    continue
+            # register the listeners of all rooms at once
+            await asyncio.gather(*[self.add_room(room) for room in self.rooms.values()])
+
+            # display names of the doors/windows, no lookups needed when notifying
+            self.friendly_names.update(
+                {
+                    entity: states[entity].get("attributes", {}).get("friendly_name") or entity
+                    for entity in self.door_windows
+                    if entity in states
+                }
+            )
 
-                self.rooms[room_name] = room
+            # an empty reminder heap is falsy, but still to be handed over
+            if (reminders := handoff.get("reminders")) is not None:
+                # pending reminders of unchanged rooms keep running
+                for entity, (_, _, reminder) in list(reminders.pending.items()):
+                    if (
+                        self.rooms.get(reminder["session"].room.name)
+                        is not reminder["session"].room
+                        or states.get(entity, {}).get("state") != "on"
+                    ):
+                        reminders.cancel(entity)
+                self.reminders = reminders
+
+            # kept rooms may have open doors/windows without a pending reminder
+            self.contacts.update(handoff.get("contacts", {}))
+            self.open_rooms = {
+                room.index: room for room in self.rooms.values() if room.open_windows
+            }
 
         # requirements checks
-        if not all([self.notify_service, self.sensors_outdoor]):
+        if not all([self.notify_services, self.sensors_outdoor]):
             self.lg("")
-            if not self.notify_service or not self.sensors_outdoor:
+            if not self.notify_services or not self.sensors_outdoor:
                 self.lg(f"No {hl('notify_service')} configured!", icon="⚠️ ")
             if not self.sensors_outdoor:
                 self.lg(f"No {hl('outdoor')} sensors configured!", icon="⚠️ ")
@@ -311,19 +1258,73 @@ class NotiFreeze(hass.Hass):  # type: ignore
 
             return
 
+        # outdoor mean shared with other apps using the same sensors
+        self.outdoor_provider = await OutdoorTemperature.subscribe(
+            self, self.sensors_outdoor, dict(await states_sensor)
+        )
+
+        # fill the temperature cache and keep it up to date
+        await self.listen_temperatures(dict(await states_sensor))
+
+        # keep the sensor index and door/window names up to date on added/renamed/removed entities
+        for domain in ["binary_sensor", "sensor"] if self.discoverable else ["binary_sensor"]:
+            await self.listen_state(self.reindex, entity=domain, attribute="friendly_name")
+
+        if self.recorder:
+            await self.start_recording({**await states_binary_sensor, **await states_sensor})
+
+        # re-arm reminders of doors/windows left open during a restart
+        await self.restore_sessions(await states_binary_sensor)
+
+        # notification senders
+        self.outbox.start(self.queue_workers)
+
+        # central reminder scheduler
+        await self.run_every(self.tick, "now", self.tick_interval)
+
+        if self.metrics:
+            await self.run_every(self.publish_metrics, "now", self.metrics_interval)
+
+        if self.profile_event:
+            await self.listen_event(self.toggle_profiling, self.profile_event)
+
         # set units
         self.args.setdefault(
-            "_units", {"max_difference": "°C", "initial": "min", "reminder": "min"}
+            "_units",
+            {
+                "max_difference": "°C",
+                "initial": "min",
+                "reminder": "min",
+                "tick": "sec",
+                "digest": "sec",
+                "last_valid_ttl": "min",
+            },
         )
         self.args.setdefault("_prefixes", {"max_difference": "±"})
 
         self.args.update(
             {
                 "max_difference": self.max_difference,
-                "notify_service": self.notify_service.replace("/", "."),
+                "notify_service": [service.replace("/", ".") for service in self.notify_services],
+                "queue": {
+                    "size": self.outbox.queue.maxsize,
+                    "workers": self.queue_workers,
+                    "retries": self.outbox.retries,
+                    "backoff": self.outbox.backoff,
+                },
                 "always_notify": self.always_notify,
                 "sensors_outdoor": self.sensors_outdoor,
                 "delays": {"initial": self.initial_delay, "reminder": self.reminder_delay},
+                "tick": self.tick_interval,
+                "digest": self.digest,
+                "debounce": self.debounce,
+                "listener": self.listener,
+                "last_valid_ttl": self.quarantine.ttl / SECONDS_PER_MIN,
+                "sessions": str(self.sessions_file) if self.sessions_file else False,
+                "cache": str(self.cache_file) if self.cache_file else False,
+                "metrics": self.metrics_entity if self.metrics else False,
+                "record": str(self.recorder.path) if self.recorder else False,
+                "profile": self.profile_event or False,
                 **self.rooms,
             }
         )
@@ -331,6 +1332,491 @@ class NotiFreeze(hass.Hass):  # type: ignore
         # show parsed config
         self.show_info(self.args)
 
+    def build_index(self, states: Dict[str, Dict[str, Any]]) -> SensorIndex:
+        index = SensorIndex([KEYWORD_DOOR_WINDOW, KEYWORD_TEMPERATURE])
+        for entity_id, state in states.items():
+            index.add(entity_id, state.get("attributes", {}).get("friendly_name"))
+
+        return index
+
+    def resolve_rooms(
+        self, rooms: List[Union[str, Dict[str, Any]]], states: Dict[str, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Resolve the door/window and temperature sensors of the configured rooms."""
+        self.index = self.build_index(states)
+        resolved: List[Dict[str, Any]] = []
+
+        for room_config in rooms:
+
+            room_name: str = str()
+
+            # door/window sensors of a room
+            door_window: Set[str] = set()
+            # temperature sensors of a room
+            indoor: Set[str] = set()
+            # keywords of auto-discovered sensors
+            discover: Set[str] = set()
+
+            #  very hacky, needs refactoring
+            if isinstance(room_config, dict):
+                room_name = room_config.pop("name").capitalize()
+                room_alias = room_config.pop("alias", room_name)
+
+                if configured := self.listr(room_config.pop("door_window", None)):
+                    door_window.update(configured)
+                else:
+                    discover.add(KEYWORD_DOOR_WINDOW)
+
+                if configured := self.listr(room_config.pop("indoor", None)):
+                    indoor.update(configured)
+                else:
+                    discover.add(KEYWORD_TEMPERATURE)
+
+            elif isinstance(room_config, str):
+                room_name = room_alias = room_config.capitalize()
+                discover.update([KEYWORD_DOOR_WINDOW, KEYWORD_TEMPERATURE])
+
+            if KEYWORD_DOOR_WINDOW in discover:
+                door_window.update(self.find_sensors(KEYWORD_DOOR_WINDOW, room_alias))
+            if KEYWORD_TEMPERATURE in discover:
+                indoor.update(self.find_sensors(KEYWORD_TEMPERATURE, room_alias))
+
+            resolved.append(
+                {
+                    "name": room_name,
+                    "alias": room_alias,
+                    "discover": sorted(discover),
+                    "door_window": sorted(self.listr(door_window)),
+                    "temperature": sorted(self.listr(indoor)),
+                }
+            )
+
+        return resolved
+
+    def room_cache_key(
+        self, rooms: List[Union[str, Dict[str, Any]]], states: Dict[str, Dict[str, Any]]
+    ) -> str:
+        """Hash of the rooms config and all entities relevant for resolving it."""
+        configured: Set[str] = set()
+        for room_config in rooms:
+            if isinstance(room_config, dict):
+                for key in ["door_window", "indoor"]:
+                    entities = room_config.get(key) or []
+                    configured.update([entities] if isinstance(entities, str) else entities)
+
+        relevant = sorted(
+            f"{entity_id}|{state.get('attributes', {}).get('friendly_name', '')}"
+            for entity_id, state in states.items()
+            if entity_id in configured
+            or KEYWORD_DOOR_WINDOW in entity_id
+            or KEYWORD_TEMPERATURE in entity_id
+        )
+        # configured entities of other domains only need to exist
+        relevant += [
+            f"{entity}|{self.entity_exists(entity)}" for entity in configured - set(states)
+        ]
+
+        digest = sha256(json.dumps([__version__, rooms], sort_keys=True, default=str).encode())
+        digest.update("\n".join(relevant).encode())
+
+        return digest.hexdigest()
+
+    def load_room_cache(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        if not self.cache_file or not self.cache_file.exists():
+            return None
+
+        try:
+            cache = json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return None
+
+        return cache["rooms"] if cache.get("key") == key else None
+
+    def save_room_cache(self, key: str, rooms: List[Dict[str, Any]]) -> None:
+        if not self.cache_file:
+            return
+
+        try:
+            temporary = self.cache_file.with_suffix(".tmp")
+            temporary.write_text(json.dumps({"key": key, "rooms": rooms}))
+            os.replace(temporary, self.cache_file)
+        except OSError as error:
+            self.lg(f"saving rooms to {self.cache_file} failed: {error}", level="WARNING")
+
+    async def add_room(self, room: Room) -> None:
+        """Start monitoring the door/window and temperature sensors of a room."""
+        entities = list(room.door_window)
+        self.door_windows.update(dict.fromkeys(entities, room))
+
+        if self.listener != "domain":
+            handles = await asyncio.gather(
+                *[
+                    self.listen_state(
+                        self.debounced if self.debounce else self.handler, entity=entity, room=room
+                    )
+                    for entity in entities
+                ]
+            )
+            self.door_window_listeners.update(zip(entities, handles))
+
+        for sensor in room.temperature:
+            self.temperature_sensors.setdefault(sensor, []).append(room.indoor_temperature)
+
+        self.rooms[room.name] = room
+
+    async def add_door_window(self, room: Room, entity: str) -> None:
+        room.door_window.add(entity)
+        self.door_windows[entity] = room
+
+        if self.listener != "domain":
+            self.door_window_listeners[entity] = await self.listen_state(
+                self.debounced if self.debounce else self.handler, entity=entity, room=room
+            )
+
+    async def remove_door_window(self, room: Room, entity: str) -> None:
+        room.door_window.discard(entity)
+        self.door_windows.pop(entity, None)
+        if entity in room.open_windows:
+            room.close(entity)
+        await self.cancel_reminder(room, entity)
+        if handle := self.door_window_listeners.pop(entity, None):
+            await self.cancel_listen_state(handle)
+
+    async def remove_temperature(self, room: Room, sensor: str) -> None:
+        room.temperature.discard(sensor)
+        room.indoor_temperature.remove(sensor)
+
+        if room.indoor_temperature in (means := self.temperature_sensors.get(sensor, [])):
+            means.remove(room.indoor_temperature)
+        if not means and (handle := self.temperature_listeners.pop(sensor, None)):
+            self.temperature_sensors.pop(sensor, None)
+            await self.cancel_listen_state(handle)
+
+    async def listen_temperatures(self, states: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """Listen to and fill the cache of all temperature sensors not yet listened to."""
+        if sensors := [s for s in self.temperature_sensors if s not in self.temperature_listeners]:
+            await self.refresh_temperatures(states or {}, sensors)
+            handles = await asyncio.gather(
+                *[self.listen_state(self.temperature, entity=sensor) for sensor in sensors]
+            )
+            self.temperature_listeners.update(zip(sensors, handles))
+
+    async def snapshot(
+        self, sensors: Iterable[str], states: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Return the state of each sensor, fetching those missing in the given snapshot."""
+        # sensors outside of the snapshot are fetched concurrently
+        if missing := [sensor for sensor in sensors if sensor not in states]:
+            fetched = await asyncio.gather(
+                *[self.get_state(sensor, attribute="all") for sensor in missing]
+            )
+            states.update({sensor: state or {} for sensor, state in zip(missing, fetched)})
+
+        return {sensor: states[sensor].get("state") for sensor in sensors}
+
+    @profiled
+    async def refresh_temperatures(
+        self, states: Dict[str, Dict[str, Any]], sensors: Optional[Iterable[str]] = None
+    ) -> None:
+        """Fill the temperature cache from a single state snapshot."""
+        sensors = list(self.temperature_sensors if sensors is None else sensors)
+
+        for sensor, state in (await self.snapshot(sensors, states)).items():
+            for mean in self.temperature_sensors[sensor]:
+                mean.update(sensor, state)
+
+    async def feed_outdoor(
+        self, provider: OutdoorTemperature, states: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Fill the shared outdoor mean and keep it up to date with this app's listeners."""
+        for sensor, state in (await self.snapshot(provider.sensors, states)).items():
+            provider.temperature.update(sensor, state)
+
+        for sensor in provider.sensors:
+            await self.listen_state(self.outdoor_changed, entity=sensor)
+
+    @profiled
+    async def outdoor_changed(
+        self, entity: str, attr: Any, old: str, new: str, kwargs: Dict[str, Any]
+    ) -> None:
+        """Forward outdoor sensor changes to the shared provider."""
+        if await self.quarantined(entity, new):
+            await self.outdoor_provider.update(entity, new, keep=entity in self.quarantine.kept)
+        else:
+            await self.outdoor_provider.update(entity, new)
+
+    async def outdoor_updated(self, outdoor: Optional[float]) -> None:
+        """Receive the new outdoor mean from the shared provider."""
+        if outdoor is not None and self.open_rooms:
+            await self.evaluate(list(self.open_rooms.values()), outdoor)
+
+    async def evaluate(self, rooms: List[Room], outdoor: Optional[float]) -> None:
+        """Arm/disarm the reminders of open doors/windows on threshold crossings."""
+        now: Optional[float] = None
+        differences, exceeded_rooms = thresholds(
+            self.table.indoor, self.table.max_difference, outdoor, [room.index for room in rooms]
+        )
+
+        for room, difference, exceeded in zip(rooms, differences, exceeded_rooms):
+            if isnan(difference):
+                continue
+
+            for entity, session in list(room.open_windows.items()):
+                if exceeded == (entity in self.reminders):
+                    continue
+
+                if exceeded:
+                    now = now or await self.get_now_ts()
+                    if session.initial is None:
+                        session.initial = room.indoor()
+                    self.reminders.schedule(
+                        entity, now + self.initial_delay * SECONDS_PER_MIN, session=session
+                    )
+                    change = (
+                        f"{hl(f'{difference:+.1f}°C')} → reminder in {hl(self.initial_delay)}min"
+                    )
+                else:
+                    self.reminders.cancel(entity)
+                    change = f"{hl(f'{difference:+.1f}°C')} within threshold → reminder stopped"
+
+                if self.logs():
+                    self.lg(
+                        f"{room.name} {hl(session.name)} open, {change}",
+                        icon=APP_ICON,
+                    )
+
+    async def terminate(self) -> None:
+        """Save the open sessions and hand the shared outdoor provider over to another app."""
+        if self.profiler:
+            await self.stop_profiling({})
+
+        if reminders := getattr(self, "reminders", None):
+            if reminders.dirty:
+                self.save_sessions()
+
+        if provider := getattr(self, "outdoor_provider", None):
+            await provider.unsubscribe(self)
+
+        if outbox := getattr(self, "outbox", None):
+            if len(outbox):
+                self.lg(f"{len(outbox)} queued notifications dropped", level="WARNING")
+            outbox.stop()
+
+        if recorder := getattr(self, "recorder", None):
+            recorder.close()
+
+        if rooms := getattr(self, "rooms", None):
+            # picked up by the next initialize of this app if only its config changed
+            handoffs[self.name] = {
+                "rooms": rooms,
+                "reminders": self.reminders,
+                "contacts": self.contacts,
+            }
+
+    def unchanged(self, room: Room, spec: Dict[str, Any], push_data: Dict[str, Any]) -> bool:
+        """Whether a room of the previous config equals its new resolved config."""
+        return (
+            room.alias == spec["alias"]
+            and room.discover == frozenset(spec["discover"])
+            and room.door_window == set(spec["door_window"])
+            and room.temperature == set(spec["temperature"])
+            and room.push_data == push_data
+        )
+
+    def close_missed(self, room: Room, states: Dict[str, Dict[str, Any]]) -> None:
+        """Close doors/windows of a kept room that were closed during the reload."""
+        for entity in list(room.open_windows):
+            if states.get(entity, {}).get("state") != "on":
+                room.close(entity)
+
+    def recorded(self, entity: str) -> bool:
+        return (
+            entity in self.door_windows
+            or entity in self.temperature_listeners
+            or entity in self.sensors_outdoor
+        )
+
+    async def start_recording(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """Write the current states of all monitored entities, then record their changes."""
+        now = await self.get_now_ts()
+
+        for entity, state in states.items():
+            if self.recorded(entity):
+                self.recorder.write(  # type: ignore
+                    now,
+                    entity,
+                    state.get("state"),
+                    attributes={"friendly_name": state.get("attributes", {}).get("friendly_name")},
+                    snapshot=True,
+                )
+
+        for domain in ["binary_sensor", "sensor"]:
+            await self.listen_state(self.record, entity=domain)
+
+    async def record(
+        self, entity: str, attr: Any, old: Optional[str], new: Optional[str], kwargs: Dict[str, Any]
+    ) -> None:
+        if self.recorder and self.recorded(entity):
+            self.recorder.write(await self.get_now_ts(), entity, new)
+
+    @measured
+    async def reindex(
+        self, entity: str, attr: Any, old: Optional[str], new: Optional[str], kwargs: Dict[str, Any]
+    ) -> None:
+        """Update the sensor index and auto-discovered rooms on added/renamed/removed entities."""
+        if room := self.door_windows.get(entity):
+            self.friendly_names[entity] = new or entity
+            if session := room.open_windows.get(entity):
+                session.name = await self.fname(entity, room.name)
+
+        if not self.discoverable:
+            return
+
+        if self.index is None:
+            # started from the room cache, the index is built from the current states
+            states = self.get_state(entity_id="binary_sensor"), self.get_state(entity_id="sensor")
+            self.index = self.build_index({**await states[0], **await states[1]})
+        elif not (
+            self.index.add(entity, new) if self.entity_exists(entity) else self.index.remove(entity)
+        ):
+            return
+
+        for room in self.discoverable.values():
+            await self.rediscover(room)
+
+        await self.listen_temperatures()
+
+    async def rediscover(self, room: Room) -> None:
+        """Apply changes of the sensor index to an auto-discovered room."""
+        active = room.name in self.rooms
+
+        if KEYWORD_DOOR_WINDOW in room.discover:
+            found = self.find_sensors(KEYWORD_DOOR_WINDOW, room.alias)
+            for entity in room.door_window - found:
+                await self.remove_door_window(room, entity)
+            for entity in found - room.door_window:
+                if active:
+                    await self.add_door_window(room, entity)
+                else:
+                    room.door_window.add(entity)
+
+        if KEYWORD_TEMPERATURE in room.discover:
+            found = self.find_sensors(KEYWORD_TEMPERATURE, room.alias)
+            for sensor in room.temperature - found:
+                await self.remove_temperature(room, sensor)
+            for sensor in found - room.temperature:
+                room.temperature.add(sensor)
+                room.indoor_temperature.sensors.add(sensor)
+                if active:
+                    self.temperature_sensors.setdefault(sensor, []).append(room.indoor_temperature)
+
+        if not active and room.door_window and room.temperature:
+            await self.add_room(room)
+            self.lg(f"{hl(room.name)} discovered: {room.door_window} {room.temperature}")
+
+    @measured
+    @profiled
+    async def temperature(
+        self, entity: str, attr: Any, old: str, new: str, kwargs: Dict[str, Any]
+    ) -> None:
+        """Update the cached temperatures."""
+        now: Optional[float] = None
+        changed: List[Room] = []
+
+        quarantined = await self.quarantined(entity, new)
+        # the last valid value of a quarantined sensor is used until it expires
+        keep = quarantined and entity in self.quarantine.kept
+
+        for mean in self.temperature_sensors.get(entity, []):
+            previous = mean.mean
+            if (value := mean.update(entity, new, keep)) is None:
+                continue
+
+            # an invalid state only counts if its sensor's value was dropped from the mean
+            elif quarantined and value == previous:
+                continue
+
+            elif mean.column is not None and (room := self.open_rooms.get(mean.index)):
+                now = now or await self.get_now_ts()
+                for session in room.open_windows.values():
+                    session.trend.add(now, value)
+                changed.append(room)
+
+        if changed:
+            await self.evaluate(changed, self.outdoor())
+
+    async def quarantined(self, entity: str, state: Any) -> bool:
+        """Quarantine sensors reporting invalid states and release them on the next valid one."""
+        if parse_temperature(state) is not None:
+            if (since := self.quarantine.release(entity)) is not None:
+                minutes = round((await self.get_now_ts() - since) / SECONDS_PER_MIN, 1)
+                self.lg(f"{hl_entity(entity)} valid again after {hl(minutes)}min", icon=APP_ICON)
+            return False
+
+        if self.quarantine.add(entity, await self.get_now_ts()):
+            self.lg(
+                f"{hl_entity(entity)} quarantined, invalid state {hl(state)} ¯\\_(ツ)_/¯",
+                level="WARNING",
+            )
+
+        return True
+
+    async def expire_quarantined(self, now: float) -> None:
+        """Stop using the last valid values of sensors quarantined longer than the ttl."""
+        rooms: List[Room] = []
+
+        for sensor in self.quarantine.expired(now):
+            self.lg(f"{hl_entity(sensor)} last valid value expired", level="WARNING")
+
+            if sensor in self.sensors_outdoor:
+                await self.outdoor_provider.expire(sensor)
+            for mean in self.temperature_sensors.get(sensor, []):
+                mean.expire(sensor)
+                if mean.column is not None and (room := self.open_rooms.get(mean.index)):
+                    rooms.append(room)
+
+        if rooms:
+            await self.evaluate(rooms, self.outdoor())
+
+    async def dispatch(
+        self, entity: str, attr: Any, old: str, new: str, kwargs: Dict[str, Any]
+    ) -> None:
+        """Pass state changes of the binary_sensor domain on to the room of the door/window."""
+        if room := self.door_windows.get(entity):
+            callback = self.debounced if self.debounce else self.handler
+            await callback(entity, attr, old, new, {"room": room})
+
+    async def debounced(
+        self, entity: str, attr: Any, old: str, new: str, kwargs: Dict[str, Any]
+    ) -> None:
+        """Merge rapid door/window transitions into one logical open/close event."""
+        self.contacts.setdefault(entity, old)
+
+        settling = entity in self.debouncing
+        self.debouncing[entity] = (new, await self.get_now_ts())
+
+        # one timer per settle period, further transitions only update the pending state
+        if not settling:
+            await self.run_in(self.settled, self.debounce, entity_id=entity, room=kwargs["room"])
+
+    async def settled(self, kwargs: Dict[str, Any]) -> None:
+        """Pass a door/window state on to the handler once it held for the debounce time."""
+        entity: str = kwargs["entity_id"]
+        state, changed = self.debouncing[entity]
+
+        # still flapping, wait until the latest state held long enough
+        if (remaining := changed + self.debounce - await self.get_now_ts()) > 0:
+            await self.run_in(self.settled, remaining, **kwargs)
+            return
+
+        del self.debouncing[entity]
+
+        if entity in self.door_windows and (old := self.contacts[entity]) != state:
+            self.contacts[entity] = state
+            await self.handler(entity, "state", old, state, {"room": kwargs["room"]})
+
+    @measured
+    @profiled
     async def handler(
         self, entity: str, attr: Any, old: str, new: str, kwargs: Dict[str, Any]
     ) -> None:
@@ -338,127 +1824,355 @@ class NotiFreeze(hass.Hass):  # type: ignore
 
         room: Room = kwargs.pop("room")
 
-        self.lg(
-            f"state change in {room.name} via {await self.fname(entity, room.name)}: {old} -> {new}",
-            level="DEBUG",
-        )
+        # read all temperatures at once, before anything is awaited
+        indoor = room.indoor()
+        difference = room.difference(self.outdoor())
 
-        if (
-            old == "off"
-            and new == "on"
-            and (difference := await room.difference(await self.outdoor(), self))
-        ):
+        if self.logs("DEBUG"):
+            self.lg(
+                f"state change in {room.name} via {await self.fname(entity, room.name)}: {old} -> {new}",
+                level="DEBUG",
+            )
 
-            if abs(difference) > float(self.max_difference):
+        session = room.open_windows.get(entity)
+
+        if new == "on" and session is None:
+            now = await self.get_now_ts()
+            session = room.open(entity, await self.fname(entity, room.name), now, indoor)
+            self.open_rooms[room.index] = room
+            # saved with or without a reminder, the threshold may be exceeded later
+            self.reminders.dirty = True
+
+            if exceeds(difference, room.max_difference):
 
                 # door/window opened, schedule reminder/notification
-                room.handles[entity] = await self.run_in(
-                    self.notification,
-                    self.initial_delay * SECONDS_PER_MIN,
-                    entity_id=entity,
-                    room=room,
+                self.reminders.schedule(
+                    entity, now + self.initial_delay * SECONDS_PER_MIN, session=session
                 )
 
-                self.lg(
-                    f"{room.name} {hl(await self.fname(entity, room.name))} opened, "
-                    f"{hl(f'{difference:+.1f}°C')} → reminder in {hl(self.initial_delay)}min\033[0m",
-                    icon=APP_ICON,
-                )
+                if self.logs():
+                    self.lg(
+                        f"{room.name} {hl(session.name)} opened, "
+                        f"{hl(f'{difference:+.1f}°C')} → reminder in {hl(self.initial_delay)}min\033[0m",
+                        icon=APP_ICON,
+                    )
+
+        elif new != "on" and session is not None:
+            # any other state ends the session, e.g. on → unavailable → off
+            room.close(entity)
+            if not room.open_windows:
+                self.open_rooms.pop(room.index, None)
+            self.reminders.dirty = True
+            # door/window closed, canceling scheduled reminder
+            await self.cancel_reminder(room, entity)
+
+    @measured
+    async def tick(self, kwargs: Dict[str, Any]) -> None:
+        """Evaluate all reminders due since the last tick."""
+        now = await self.get_now_ts()
+
+        if due := self.reminders.due(now):
+            # all reminders of a tick are decided at once, sharing the same outdoor temperature
+            actions = decide(
+                self.table.indoor,
+                self.table.max_difference,
+                self.outdoor(),
+                [reminder["session"].room.index for _, reminder in due],
+                [reminder["session"].initial for _, reminder in due],
+                self.always_notify,
+            )
+            await asyncio.gather(
+                *[
+                    self.notification({**reminder, "entity_id": entity, "action": action})
+                    for (entity, reminder), action in zip(due, actions)
+                ]
+            )
+
+        for service in [service for service, due in self.digests_due.items() if due <= now]:
+            await self.send_digest(service)
+
+        if self.quarantine.kept:
+            await self.expire_quarantined(now)
+
+        if self.reminders.dirty:
+            self.save_sessions()
+
+    def save_sessions(self) -> None:
+        """Snapshot the open door/window sessions and the due times of their reminders."""
+        self.reminders.dirty = False
+        if not self.sessions_file:
+            return
+
+        pending = self.reminders.pending
+        sessions = {
+            entity: {
+                "room": room.name,
+                "opened": session.opened,
+                "initial": session.initial,
+                "counter": session.counter,
+                # doors/windows within the threshold have no pending reminder
+                "due": pending[entity][0] if entity in pending else None,
+            }
+            for room in self.open_rooms.values()
+            for entity, session in room.open_windows.items()
+        }
+
+        try:
+            # write atomically, a restart may happen at any time
+            temporary = self.sessions_file.with_suffix(".tmp")
+            temporary.write_text(json.dumps(sessions))
+            os.replace(temporary, self.sessions_file)
+        except OSError as error:
+            self.lg(f"saving sessions to {self.sessions_file} failed: {error}", level="WARNING")
+
+    async def restore_sessions(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """Restore the saved sessions of doors/windows which are still open."""
+        if not self.sessions_file or not self.sessions_file.exists():
+            return
+
+        try:
+            sessions: Dict[str, Dict[str, Any]] = json.loads(self.sessions_file.read_text())
+        except (OSError, ValueError) as error:
+            self.lg(f"loading sessions from {self.sessions_file} failed: {error}", level="WARNING")
+            return
+
+        # rooms with restored sessions lacking a reminder, their threshold is checked below
+        unarmed: List[Room] = []
+
+        for entity, saved in sessions.items():
+            room = self.rooms.get(saved.get("room", ""))
+            # sessions of rooms kept on a config reload are still open
+            if not room or entity not in room.door_window or entity in room.open_windows:
+                continue
+            if states.get(entity, {}).get("state") != "on":
+                continue
+
+            session = room.open(
+                entity,
+                await self.fname(entity, room.name),
+                saved.get("opened") or await self.get_now_ts(),
+                saved.get("initial"),
+            )
+            session.counter = int(saved.get("counter", 1))
+            self.open_rooms[room.index] = room
+            self.contacts[entity] = "on"
+
+            if saved.get("due") is None:
+                unarmed.append(room)
+                self.lg(f"{room.name} {hl_entity(entity)} still open", icon=APP_ICON)
+                continue
+
+            self.reminders.schedule(entity, float(saved["due"]), session=session)
+            self.lg(
+                f"{room.name} {hl_entity(entity)} still open → reminder restored", icon=APP_ICON
+            )
 
-        elif old == "on" and new == "off":
-            # door/window closed, canceling scheduled callbacks
-            await self.clear_handles(room, entity)
+        # the temperatures may have crossed the threshold during the restart
+        if unarmed:
+            await self.evaluate(unarmed, self.outdoor())
 
+        # drop sessions of doors/windows closed meanwhile
+        self.save_sessions()
+
+    async def notify(self, room: Room, message: str) -> None:
+        """Send a notification or collect it for the next digest."""
+        message = re.sub(r"\033\[\dm", "", message)
+
+        if not self.digest:
+            for service in self.notify_services:
+                self.outbox.put(service, message, room.push_data)
+            return
+
+        now = await self.get_now_ts()
+        for service in self.notify_services:
+            if service not in self.digests_due:
+                self.digests_due[service] = now + self.digest
+            self.digests.setdefault(service, []).append((room, message))
+
+    async def send_digest(self, service: str) -> None:
+        """Send all collected notifications as one message, one line per room."""
+        self.digests_due.pop(service, None)
+        if not (collected := self.digests.pop(service, [])):
+            return
+
+        lines: Dict[str, List[str]] = {}
+        for room, message in collected:
+            lines.setdefault(room.name, []).append(message)
+
+        if len(lines) == 1:
+            # single room, keep its own push settings
+            data = collected[0][0].push_data
+        else:
+            data = self.digest_push_data
+
+        self.outbox.put(
+            service,
+            "\n".join(" · ".join(messages) for _, messages in sorted(lines.items())),
+            data,
+        )
+
+    @measured
+    @profiled
     async def notification(self, kwargs: Dict[str, Any]) -> None:
         """Send notification."""
-        room: Room = kwargs.pop("room")
-        entity_id: str = kwargs["entity_id"]
-        counter: int = int(kwargs.get("counter", 1))
+        session: Session = kwargs["session"]
+        room, entity_id = session.room, session.entity
+        # decided by the engine for all reminders of the tick
+        action: int = kwargs["action"]
 
-        self.lg(
-            f"notification for {room.name} triggered via {await self.fname(entity_id, room.name)} ({counter})",
-            level="DEBUG",
-        )
+        indoor = room.indoor()
+
+        if self.logs("DEBUG"):
+            self.lg(
+                f"notification for {room.name} triggered via {session.name} ({session.counter})",
+                level="DEBUG",
+            )
 
-        if (outdoor := await self.outdoor()) and (indoor := await room.indoor(self)):
+        # a closed door/window ends its session, no need to look up its state
+        if action == STOP or indoor is None or room.open_windows.get(entity_id) is not session:
+            # temperature difference in allowed thresholds, no further reminders
+            self.lg(
+                f"{room.name} {entity_id}: difference within threshold → reminder stopped",
+                level="DEBUG",
+            )
+            return
 
-            difference = await room.difference(outdoor, self)
+        if session.initial is None:
+            session.initial = indoor
+
+        if self.logs("DEBUG"):
+            self.lg(
+                f"notification for {room.name} via {session.name}: "
+                f"{indoor = } - {session.initial = } = {indoor - session.initial = }",
+                level="DEBUG",
+            )
 
-            if (
-                difference
-                and abs(difference) > float(self.max_difference)
-                and await self.get_state(entity_id) == "on"
-            ):
+        now = await self.get_now_ts()
 
-                # build notification/log msg
-                initial: float = float(kwargs.get("initial", indoor))
-                indoor_difference: float = indoor - initial
+        if action == SEND:
 
+            message = self.create_message(session, indoor, now)
+
+            # send notification
+            await self.notify(room, message)
+
+            # schedule next reminder
+            session.counter += 1
+            self.reminders.schedule(
+                entity_id, now + self.reminder_delay * SECONDS_PER_MIN, session=session
+            )
+
+            # debug
+            self.lg(
+                f"notifying {', '.join(hl(PurePath(service).stem.capitalize()) for service in self.notify_services)}: {message}",
+                icon=f"{APP_ICON} ❗",
+            )
+
+        elif action == RECHECK:
+            # no indoor change yet, remind once the trend predicts one
+            due = next_check(
+                session.trend,
+                session.initial,
+                now + SECONDS_PER_MIN,
+                now + self.reminder_delay * SECONDS_PER_MIN,
+            )
+            self.reminders.schedule(entity_id, due, session=session)
+
+            if self.logs("DEBUG"):
                 self.lg(
-                    f"notification for {room.name} via {await self.fname(entity_id, room.name)}: "
-                    f"{indoor = } - {initial = } = {indoor_difference = }",
+                    f"{room.name} {entity_id}: no indoor change → "
+                    f"next check in {round((due - now) / SECONDS_PER_MIN, 1)}min",
                     level="DEBUG",
                 )
 
-                if abs(indoor_difference) > 0 or self.always_notify:
+    async def publish_metrics(self, kwargs: Dict[str, Any]) -> None:
+        """Publish the collected metrics as sensor entity and Prometheus text file."""
+        if not self.metrics:
+            return
 
-                    message = await self.create_message(room, entity_id, indoor, initial)
+        gauges = {
+            "pending_reminders": len(self.reminders),
+            "reminder_heap_size": len(self.reminders.heap),
+            "door_windows": len(self.door_windows),
+            "door_window_listeners": len(self.door_window_listeners),
+            "temperature_listeners": len(self.temperature_listeners),
+            "active_rooms": len(self.rooms),
+            "quarantined_sensors": len(self.quarantine),
+            "queued_notifications": len(self.outbox),
+            "failed_notifications": self.outbox.failed,
+        }
+
+        await self.set_state(
+            self.metrics_entity,
+            state=len(self.reminders),
+            attributes={
+                "friendly_name": f"{APP_NAME} metrics",
+                "unit_of_measurement": "reminders",
+                **self.metrics.attributes(gauges),
+            },
+        )
 
-                    # send notification
-                    await self.call_service(
-                        self.notify_service,
-                        message=re.sub(r"\033\[\dm", "", message),
-                        data=room.push_data,
-                    )
+        if self.metrics_file:
+            try:
+                # write atomically, the file may be scraped at any time
+                temporary = self.metrics_file.with_suffix(f"{self.metrics_file.suffix}.tmp")
+                temporary.write_text(self.metrics.prometheus(self.name, gauges))
+                os.replace(temporary, self.metrics_file)
+            except OSError as error:
+                self.lg(f"writing metrics to {self.metrics_file} failed: {error}", level="WARNING")
+
+    async def toggle_profiling(
+        self, event: str, data: Dict[str, Any], kwargs: Dict[str, Any]
+    ) -> None:
+        """Start/stop profiling, the event may name the app, `enable` it and limit it to `seconds`."""
+        if data.get("app", self.name) != self.name:
+            return
 
-                    # schedule next reminder
-                    room.handles[entity_id] = await self.run_in(
-                        self.notification,
-                        self.reminder_delay * SECONDS_PER_MIN,
-                        entity_id=entity_id,
-                        room=room,
-                        initial=initial,
-                        counter=counter + 1,
-                    )
+        if not bool(data.get("enable", self.profiler is None)):
+            await self.stop_profiling({})
+        elif not self.profiler:
+            self.profiler = Profiler(self.profile_interval)
+            self.lg(
+                f"profiling started, stopped by the {hl(str(self.profile_event))} event",
+                icon=APP_ICON,
+            )
 
-                    # debug
-                    self.lg(
-                        f"notifying {hl(PurePath(self.notify_service).stem.capitalize())}: {message}",
-                        icon=f"{APP_ICON} ❗",
-                    )
+            if seconds := data.get("seconds"):
+                # a timer of an earlier run does not stop this one
+                await self.run_in(self.stop_profiling, float(seconds), profiler=self.profiler)
 
-            elif entity_id in room.handles:
-                # temperature difference in allowed thresholds, cancelling scheduled callbacks
-                await self.clear_handles(room, entity_id)
-
-    async def find_sensors(
-        self, keyword: str, room_name: str, states: Dict[str, Dict[str, Any]]
-    ) -> List[str]:
-        """Find sensors by looking for a keyword in the friendly_name."""
-        room_name = room_name.lower()
-        matches: List[str] = []
-        for state in states.values():
-            if (
-                keyword in (entity_id := state.get("entity_id", ""))
-                and room_name
-                in "|".join(
-                    [entity_id, state.get("attributes", {}).get("friendly_name", "")]
-                ).lower()
-            ):
-                matches.append(entity_id)
-
-        return matches
-
-    async def create_message(
-        self, room: Room, entity_id: str, indoor: float, initial: float
-    ) -> str:
+    async def stop_profiling(self, kwargs: Dict[str, Any]) -> None:
+        """Stop profiling and write the profile."""
+        if not (profiler := self.profiler) or kwargs.get("profiler", profiler) is not profiler:
+            return
+
+        self.profiler = None
+        profiler.stop()
+
+        path = self.profile_dir / f"{self.name}-{(await self.get_now()).strftime('%Y%m%d-%H%M%S')}"
+        try:
+            stats, folded = profiler.write(path)
+        except OSError as error:
+            self.lg(f"writing the profile to {path} failed: {error}", level="WARNING")
+            return
+
+        self.lg(
+            f"profile written to {hl(str(stats))}, "
+            f"{sum(profiler.stacks.values())} of {profiler.samples} samples to {hl(str(folded))}",
+            icon=APP_ICON,
+        )
+
+    def find_sensors(self, keyword: str, room_name: str) -> Set[str]:
+        """Find sensors by looking up the room name in the entity id/friendly_name index."""
+        return self.index.find(keyword, room_name) if self.index else set()
+
+    def create_message(self, session: Session, indoor: float, now: float) -> str:
+        initial: float = indoor if session.initial is None else session.initial
         tpl = self.msgs["since"] if indoor == initial else self.msgs["change"]
         return tpl.format(
-            room_name=room.name,
-            entity_name=hl(await self.fname(entity_id, room.name)),
-            open_since=await get_timestring(
-                await self.get_state(entity_id, attribute="last_changed")
-            ),
+            room_name=session.room.name,
+            entity_name=hl(session.name),
+            open_since=get_timestring(now - session.opened),
             initial=round(initial, 1),
             indoor=round(indoor, 1),
             indoor_difference=f"{(indoor - initial):+.1f}",
@@ -466,19 +2180,18 @@ class NotiFreeze(hass.Hass):  # type: ignore
 
     async def fname(self, entity: str, room_name: str) -> str:
         """Return a new friendly name by stripping the room name of the orig. friendly name."""
-        return (await self.friendly_name(entity)).replace(room_name, "").strip()
-
-    async def clear_handles(self, room: Room, entity: str) -> None:
-        """clear scheduled timers/callbacks."""
-        if handle := room.handles.pop(entity, None):
-            await self.cancel_timer(handle)
-
-            self.lg(
-                f"{room.name} {hl(await self.fname(entity, room.name))} closed → timer stopped",
-                icon=APP_ICON,
-            )
-
-        room.handles.clear()
+        if (name := self.friendly_names.get(entity)) is None:
+            name = self.friendly_names[entity] = await self.friendly_name(entity)
+        return name.replace(room_name, "").strip()
+
+    async def cancel_reminder(self, room: Room, entity: str) -> None:
+        """Cancel the scheduled reminder of a door/window."""
+        if self.reminders.cancel(entity):
+            if self.logs():
+                self.lg(
+                    f"{room.name} {hl(await self.fname(entity, room.name))} closed → timer stopped",
+                    icon=APP_ICON,
+                )
 
     def show_info(self, config: Optional[Dict[str, Any]] = None) -> None:
         # log loaded config
@@ -490,37 +2203,38 @@ class NotiFreeze(hass.Hass):  # type: ignore
             self.lg("no configuration available", icon="‼️", level="ERROR")
             return
 
-        room = ""
-        if "room" in self.config:
-            room = f" · {hl(self.config['room'].capitalize())}"
+        with self.log_block():
+            room = ""
+            if "room" in self.config:
+                room = f" · {hl(self.config['room'].capitalize())}"
 
-        self.lg("")
-        self.lg(f"{hl(APP_NAME)} v{hl(__version__)}{room}", icon=self.icon)
-        self.lg("")
+            self.lg("")
+            self.lg(f"{hl(APP_NAME)} v{hl(__version__)}{room}", icon=self.icon)
+            self.lg("")
 
-        listeners = self.config.pop("listeners", None)
+            listeners = self.config.pop("listeners", None)
 
-        for key, value in self.config.items():
+            for key, value in self.config.items():
 
-            # hide "internal keys" when displaying config
-            if key in ["module", "class", "handles"] or key.startswith("_"):
-                continue
+                # hide "internal keys" when displaying config
+                if key in ["module", "class", "handles"] or key.startswith("_"):
+                    continue
 
-            if isinstance(value, list) or isinstance(value, set):
-                self.print_collection(key, value, 2)
-            elif isinstance(value, dict):
-                self.print_collection(key, value, 2)
-            elif isinstance(value, Room):
-                self.print_collection(key, value.__dict__, 2)
-            else:
-                self._print_cfg_setting(key, value, 2)
+                if isinstance(value, list) or isinstance(value, set):
+                    self.print_collection(key, value, 2)
+                elif isinstance(value, dict):
+                    self.print_collection(key, value, 2)
+                elif isinstance(value, Room):
+                    self.print_collection(key, value.info(), 2)
+                else:
+                    self._print_cfg_setting(key, value, 2)
 
-        if listeners:
-            self.lg("  event listeners:")
-            for listener in sorted(listeners):
-                self.lg(f"    · {hl(listener)}")
+            if listeners:
+                self.lg("  event listeners:")
+                for listener in sorted(listeners):
+                    self.lg(f"    · {hl(listener)}")
 
-        self.lg("")
+            self.lg("")
 
     def print_collection(self, key: str, collection: Iterable[Any], indentation: int = 0) -> None:
 
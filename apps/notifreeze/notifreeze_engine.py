@@ -0,0 +1,162 @@
+"""NotiFreeze decision engine
+   Open/notify decisions over the array-backed state of all rooms, free of any Home Assistant I/O.
+
+    Uses NumPy for large batches if it is installed, plain Python otherwise.
+"""
+
+from array import array
+from math import isnan, nan
+from statistics import fmean
+from typing import List, Optional, Sequence, Tuple
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# indoor samples kept per open door/window for the trend fit
+TREND_SAMPLES = 8
+# smallest indoor change (°C) worth a reminder, it shows in the rounded message
+MIN_INDOOR_CHANGE = 0.05
+# batches of at least this many rooms are computed with numpy
+VECTORIZE_MIN = 32
+
+# reminder decisions
+STOP = 0
+RECHECK = 1
+SEND = 2
+
+
+class RoomTable:
+    """Array-backed numeric state of all rooms, column index is `Room.index`."""
+
+    def __init__(self) -> None:
+        # latest indoor mean, nan if unknown
+        self.indoor: "array[float]" = array("d")
+        # max tolerated outdoor/indoor difference
+        self.max_difference: "array[float]" = array("d")
+
+    def __len__(self) -> int:
+        return len(self.indoor)
+
+    def add(self, max_difference: float) -> int:
+        """Add a column row for a new room and return its index."""
+        self.indoor.append(nan)
+        self.max_difference.append(max_difference)
+
+        return len(self.indoor) - 1
+
+
+class Trend:
+    """Ring buffer of indoor temperature samples with a least squares line fit."""
+
+    __slots__ = ("times", "values", "position")
+
+    def __init__(self, size: int = TREND_SAMPLES) -> None:
+        self.times: "array[float]" = array("d", [nan] * size)
+        self.values: "array[float]" = array("d", [nan] * size)
+        # total number of samples added, the oldest one is overwritten when full
+        self.position = 0
+
+    def add(self, timestamp: float, value: float) -> None:
+        index = self.position % len(self.times)
+        self.times[index] = timestamp
+        self.values[index] = value
+        self.position += 1
+
+    def fit(self) -> Optional[Tuple[float, float, float]]:
+        """Slope (°C/s) and centroid of the samples, None without at least two points in time."""
+        if (samples := min(self.position, len(self.times))) < 2:
+            return None
+
+        times, values = self.times[:samples], self.values[:samples]
+        time_mean, value_mean = fmean(times), fmean(values)
+
+        if not (variance := sum((time - time_mean) ** 2 for time in times)):
+            return None
+
+        covariance = sum(
+            (time - time_mean) * (value - value_mean) for time, value in zip(times, values)
+        )
+
+        return covariance / variance, time_mean, value_mean
+
+    def crossing(self, initial: float, step: float) -> Optional[float]:
+        """Predicted time the indoor temperature moved `step` away from `initial`."""
+        if not (fit := self.fit()) or not (slope := fit[0]):
+            return None
+
+        _, time_mean, value_mean = fit
+        target = initial + step if slope > 0 else initial - step
+
+        return time_mean + (target - value_mean) / slope
+
+
+def exceeds(difference: Optional[float], max_difference: float) -> bool:
+    """Whether an outdoor/indoor difference is above the tolerated one."""
+    return difference is not None and not isnan(difference) and abs(difference) > max_difference
+
+
+def thresholds(
+    indoor: Sequence[float],
+    max_difference: Sequence[float],
+    outdoor: Optional[float],
+    rooms: Sequence[int],
+) -> Tuple[List[float], List[bool]]:
+    """Outdoor/indoor difference (nan if unknown) of the given rooms and whether it is exceeded."""
+    if outdoor is None or not rooms:
+        return [nan] * len(rooms), [False] * len(rooms)
+
+    if np is not None and len(rooms) >= VECTORIZE_MIN:
+        index = np.asarray(rooms, dtype=np.intp)
+        differences = np.round(outdoor - np.frombuffer(indoor)[index], 2)
+        # comparisons with nan are false
+        exceeded = np.abs(differences) > np.frombuffer(max_difference)[index]
+        return differences.tolist(), exceeded.tolist()
+
+    differences = [round(outdoor - indoor[room], 2) for room in rooms]
+    return differences, [
+        exceeds(difference, max_difference[room]) for difference, room in zip(differences, rooms)
+    ]
+
+
+def decide(
+    indoor: Sequence[float],
+    max_difference: Sequence[float],
+    outdoor: Optional[float],
+    rooms: Sequence[int],
+    initial: Sequence[Optional[float]],
+    always_notify: bool = False,
+) -> List[int]:
+    """Decision for each due reminder of the given rooms and indoor temperatures at opening.
+
+    STOP: difference within the threshold or unknown, no further reminders
+    SEND: notify, the indoor temperature changed visibly or `always_notify` is set
+    RECHECK: no indoor change yet, check again later
+    """
+    _, exceeded = thresholds(indoor, max_difference, outdoor, rooms)
+    # unknown initial temperatures count as unchanged
+    initials = [nan if value is None else value for value in initial]
+
+    if np is not None and len(rooms) >= VECTORIZE_MIN:
+        current = np.frombuffer(indoor)[np.asarray(rooms, dtype=np.intp)]
+        changed = np.abs(current - np.asarray(initials)) >= MIN_INDOOR_CHANGE
+        notify = changed | always_notify
+        return np.where(exceeded, np.where(notify, SEND, RECHECK), STOP).tolist()
+
+    return [
+        (SEND if always_notify or abs(indoor[room] - value) >= MIN_INDOOR_CHANGE else RECHECK)
+        if over
+        else STOP
+        for room, value, over in zip(rooms, initials, exceeded)
+    ]
+
+
+def next_check(trend: Optional[Trend], initial: float, earliest: float, latest: float) -> float:
+    """Time the indoor trend is predicted to change visibly, bounded by `earliest` and `latest`."""
+    if not trend or (crossing := trend.crossing(initial, MIN_INDOOR_CHANGE)) is None:
+        return latest
+
+    return min(max(crossing, earliest), latest)
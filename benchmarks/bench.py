@@ -0,0 +1,238 @@
+"""NotiFreeze benchmarks
+   Drives initialize/handler/notification of synthetic homes against the fake hassapi backend.
+
+    python benchmarks/bench.py --rooms 10 100 1000 5000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import tracemalloc
+
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Tuple
+
+import fake_hass
+
+
+fake_hass.install()
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "notifreeze"))
+
+import notifreeze  # noqa: E402
+import notifreeze_engine  # noqa: E402
+
+
+# state lookups counted per event
+LOOKUPS = ["get_state", "friendly_name", "entity_exists"]
+
+
+def synthetic_home(rooms: int, windows: int = 2, sensors: int = 1) -> Dict[str, Dict[str, Any]]:
+    """States of a home with auto-discoverable door/window and temperature sensors per room.
+
+    Room numbers are zero-padded, sensors are matched by substring and "Room1" would match "Room10".
+    """
+    backend = fake_hass.Backend()
+    backend.add_entity("sensor.temperature_outdoor", "2.0", {"friendly_name": "Outdoor"})
+
+    for room in range(rooms):
+        for window in range(windows):
+            backend.add_entity(
+                f"binary_sensor.door_window_room{room:05}_{window}",
+                "off",
+                {"friendly_name": f"Room{room:05} Window {window}"},
+            )
+        for sensor in range(sensors):
+            backend.add_entity(
+                f"sensor.temperature_room{room:05}_{sensor}",
+                "21.0",
+                {"friendly_name": f"Room{room:05} Temperature {sensor}"},
+            )
+
+    return backend.states
+
+
+def config(rooms: int, cache: Any = False, listener: str = "entity") -> Dict[str, Any]:
+    return {
+        "module": "notifreeze",
+        "class": "NotiFreeze",
+        "notify_service": "notify.benchmark",
+        "outdoor": "sensor.temperature_outdoor",
+        "max_difference": 5,
+        "delays": {"initial": 1, "reminder": 1},
+        "sessions": False,
+        "cache": cache,
+        "listener": listener,
+        # one notification per room is sent at once
+        "queue": {"size": rooms},
+        "rooms": [f"Room{room:05}" for room in range(rooms)],
+    }
+
+
+async def measure(backend: fake_hass.Backend, events: List[Any]) -> Dict[str, float]:
+    """Run coroutine factories one by one, return mean latency and lookups per event."""
+    calls = sum(backend.calls[call] for call in LOOKUPS)
+    started = perf_counter()
+
+    for event in events:
+        await event()
+
+    elapsed = perf_counter() - started
+    lookups = sum(backend.calls[call] for call in LOOKUPS) - calls
+
+    return {
+        "events": len(events),
+        "latency_us": round(elapsed / max(len(events), 1) * 1e6, 1),
+        "lookups_per_event": round(lookups / max(len(events), 1), 2),
+    }
+
+
+async def startup(backend: fake_hass.Backend, args: Dict[str, Any]) -> Tuple[Any, float, int]:
+    """Initialize an app, return it with the startup time in ms and the lookups made."""
+    app = notifreeze.NotiFreeze(backend, "notifreeze", args)
+    calls = sum(backend.calls[call] for call in LOOKUPS)
+
+    started = perf_counter()
+    await app.initialize()
+    elapsed = round((perf_counter() - started) * 1e3, 1)
+
+    return app, elapsed, sum(backend.calls[call] for call in LOOKUPS) - calls
+
+
+async def scenario(rooms: int, listener: str = "entity") -> Dict[str, Any]:
+    backend = fake_hass.Backend(synthetic_home(rooms))
+    results: Dict[str, Any] = {"rooms": rooms}
+    cache = tempfile.NamedTemporaryFile(suffix=".rooms.json", delete=False)
+    cache.close()
+
+    # startup, resolving all rooms
+    app, results["startup_ms"], results["startup_lookups"] = await startup(
+        backend, config(rooms, cache.name, listener)
+    )
+
+    windows = [f"binary_sensor.door_window_room{room:05}_0" for room in range(rooms)]
+    sensors = [f"sensor.temperature_room{room:05}_0" for room in range(rooms)]
+
+    # door/window opened
+    results["open"] = await measure(
+        backend, [lambda entity=entity: backend.set(entity, "on") for entity in windows]
+    )
+    # indoor temperature changes while open
+    results["temperature"] = await measure(
+        backend, [lambda sensor=sensor: backend.set(sensor, "19.5") for sensor in sensors]
+    )
+
+    # reminders, measured per sent notification
+    sent = len(backend.services)
+
+    async def remind() -> None:
+        await backend.advance(app.initial_delay * notifreeze.SECONDS_PER_MIN)
+        # notifications are delivered by the queue workers
+        await app.outbox.queue.join()
+
+    reminder = await measure(backend, [remind])
+    notifications = len(backend.services) - sent
+    results["notification"] = {
+        "events": notifications,
+        "latency_us": round(reminder["latency_us"] / max(notifications, 1), 1),
+        "lookups_per_event": round(reminder["lookups_per_event"] / max(notifications, 1), 2),
+    }
+
+    # door/window closed
+    results["close"] = await measure(
+        backend, [lambda entity=entity: backend.set(entity, "off") for entity in windows]
+    )
+
+    # doors/windows reopened and closed via `unavailable`, e.g. a contact sensor reconnecting
+    for entity in windows:
+        await backend.set(entity, "on")
+    results["unavailable"] = await measure(
+        backend, [lambda entity=entity: backend.set(entity, "unavailable") for entity in windows]
+    )
+    for entity in windows:
+        await backend.set(entity, "off")
+
+    # the sessions ended with the unavailable state, no reminders are due anymore
+    sent = len(backend.services)
+    await remind()
+    assert len(backend.services) == sent and not app.open_rooms, "sessions left open"
+
+    # release the process-wide shared state, e.g. the outdoor provider
+    await app.terminate()
+    # a restart, not a config reload handing over the rooms
+    notifreeze.handoffs.clear()
+
+    # restart, rooms are taken from the cache
+    app, results["warm_startup_ms"], _ = await startup(backend, config(rooms, cache.name, listener))
+    await app.terminate()
+    notifreeze.handoffs.clear()
+    Path(cache.name).unlink()
+
+    return results
+
+
+def engine(rooms: int, repeat: int = 100) -> float:
+    """Mean time in µs of one engine pass deciding a due reminder in every room."""
+    table = notifreeze_engine.RoomTable()
+    for room in range(rooms):
+        table.add(5.0)
+        table.indoor[room] = 19.0 + room % 5
+
+    indices = list(range(rooms))
+    initial = [21.0] * rooms
+
+    started = perf_counter()
+    for _ in range(repeat):
+        notifreeze_engine.decide(table.indoor, table.max_difference, 2.0, indices, initial)
+
+    return round((perf_counter() - started) / repeat * 1e6, 1)
+
+
+def peak_memory(rooms: int, listener: str = "entity") -> float:
+    """Peak traced memory in MiB for startup and one open/remind/close cycle."""
+    tracemalloc.start()
+    asyncio.run(scenario(rooms, listener))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return round(peak / 2**20, 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1].strip())
+    parser.add_argument("--rooms", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--json", action="store_true", help="print results as json lines")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--listener", choices=["entity", "domain"], default="entity")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    for rooms in args.rooms:
+        results = asyncio.run(scenario(rooms, args.listener))
+        results["engine_us"] = engine(rooms)
+        if not args.no_memory:
+            results["peak_memory_mib"] = peak_memory(rooms, args.listener)
+
+        if args.json:
+            print(json.dumps(results))
+            continue
+
+        print(
+            f"{rooms:>6} rooms · startup {results['startup_ms']}ms "
+            f"({results['startup_lookups']} lookups, {results['warm_startup_ms']}ms cached)"
+            f" · engine pass {results['engine_us']}µs"
+            + (f" · peak {results['peak_memory_mib']}MiB" if "peak_memory_mib" in results else "")
+        )
+        for event in ["open", "temperature", "notification", "close", "unavailable"]:
+            print(
+                f"{'':>8}{event:<13} {results[event]['events']:>6}× "
+                f"{results[event]['latency_us']:>9}µs {results[event]['lookups_per_event']:>6} lookups"
+            )
+
+
+if __name__ == "__main__":
+    main()
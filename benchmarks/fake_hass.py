@@ -0,0 +1,283 @@
+"""In-process fake of the AppDaemon `hassapi` module
+   Simulated states, listeners, timers and service calls driven by a virtual clock.
+
+    Only the API surface NotiFreeze uses is implemented, async methods return futures
+    like AppDaemon's `sync_wrapper` does for async apps.
+"""
+
+import asyncio
+import logging
+import sys
+
+from collections import Counter
+from datetime import datetime, timezone
+from functools import wraps
+from itertools import count
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def future(coro: Callable[..., Awaitable[Any]]) -> Callable[..., "asyncio.Future[Any]"]:
+    @wraps(coro)
+    def wrapper(self: "Hass", *args: Any, **kwargs: Any) -> "asyncio.Future[Any]":
+        self.backend.calls[coro.__name__] += 1
+        return asyncio.ensure_future(coro(self, *args, **kwargs))
+
+    return wrapper
+
+
+class Listener:
+    def __init__(
+        self,
+        handle: str,
+        callback: Callable[..., Any],
+        entity: Optional[str],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        self.handle = handle
+        self.callback = callback
+        self.entity = entity
+        self.attribute: Optional[str] = kwargs.pop("attribute", None)
+        self.new: Optional[str] = kwargs.pop("new", None)
+        self.old: Optional[str] = kwargs.pop("old", None)
+        self.kwargs = kwargs
+
+
+class Timer:
+    def __init__(
+        self, due: float, callback: Callable[..., Any], kwargs: Dict[str, Any], interval: float
+    ) -> None:
+        self.due = due
+        self.callback = callback
+        self.kwargs = kwargs
+        self.interval = interval
+
+
+class Backend:
+    """Simulated Home Assistant/AppDaemon shared by all fake apps."""
+
+    def __init__(self, states: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self.states: Dict[str, Dict[str, Any]] = states or {}
+        self.now: float = EPOCH
+        self.listeners: Dict[str, Listener] = {}
+        # entity id or domain -> listener handles, AppDaemon matches callbacks similarly
+        self.subscriptions: Dict[Optional[str], Dict[str, Listener]] = {}
+        self.event_listeners: Dict[str, Tuple[Callable[..., Any], str, Dict[str, Any]]] = {}
+        self.timers: Dict[str, Timer] = {}
+        self.services: List[Tuple[float, str, Dict[str, Any]]] = []
+        self.calls: Counter = Counter()
+        self.handles = count()
+
+    def subscribe(self, listener: Listener) -> None:
+        self.listeners[listener.handle] = listener
+        self.subscriptions.setdefault(listener.entity, {})[listener.handle] = listener
+
+    def unsubscribe(self, handle: str) -> None:
+        if listener := self.listeners.pop(handle, None):
+            self.subscriptions.get(listener.entity, {}).pop(handle, None)
+
+    def handle(self, prefix: str) -> str:
+        return f"{prefix}{next(self.handles)}"
+
+    def add_entity(
+        self, entity_id: str, state: Any, attributes: Optional[Dict[str, Any]] = None
+    ) -> None:
+        changed = datetime.fromtimestamp(self.now, timezone.utc).isoformat()
+        self.states[entity_id] = {
+            "entity_id": entity_id,
+            "state": state,
+            "attributes": attributes or {},
+            "last_changed": changed,
+            "last_updated": changed,
+        }
+
+    async def set(self, entity_id: str, state: Any, **attributes: Any) -> None:
+        """Change the state of an entity and dispatch the state listeners."""
+        if entity_id not in self.states:
+            self.add_entity(entity_id, None, {})
+
+        current = self.states[entity_id]
+        old_state, old_attributes = current["state"], dict(current["attributes"])
+        changed = datetime.fromtimestamp(self.now, timezone.utc).isoformat()
+
+        current["attributes"].update(attributes)
+        current["last_updated"] = changed
+        if old_state != state:
+            current["state"] = state
+            current["last_changed"] = changed
+
+        listeners = [
+            listener
+            for key in [entity_id, entity_id.split(".")[0], None]
+            for listener in self.subscriptions.get(key, {}).values()
+        ]
+
+        for listener in listeners:
+            if listener.handle not in self.listeners:
+                continue
+
+            if listener.attribute:
+                old = old_attributes.get(listener.attribute)
+                new = current["attributes"].get(listener.attribute)
+            else:
+                old, new = old_state, state
+
+            if old == new or (listener.new is not None and listener.new != new):
+                continue
+            if listener.old is not None and listener.old != old:
+                continue
+
+            await listener.callback(
+                entity_id, listener.attribute or "state", old, new, dict(listener.kwargs)
+            )
+
+    async def fire_event(self, event: str, **data: Any) -> None:
+        for callback, name, kwargs in list(self.event_listeners.values()):
+            if name == event:
+                await callback(event, data, dict(kwargs))
+
+    async def advance(self, seconds: float) -> int:
+        """Move the virtual clock forward, firing all timers due on the way."""
+        end = self.now + seconds
+        fired = 0
+
+        while self.timers:
+            handle, timer = min(self.timers.items(), key=lambda item: item[1].due)
+            if timer.due > end:
+                break
+
+            self.now = max(self.now, timer.due)
+            if timer.interval:
+                timer.due += timer.interval
+            else:
+                del self.timers[handle]
+
+            await timer.callback(dict(timer.kwargs))
+            fired += 1
+
+        self.now = end
+
+        return fired
+
+
+class Hass:
+    """Fake `hassapi.Hass`, instantiated with the backend, app name and app arguments."""
+
+    def __init__(self, backend: Backend, name: str, args: Dict[str, Any]) -> None:
+        self.backend = backend
+        self.name = name
+        self.args = args
+        self.logger = logging.getLogger(f"fake_hass.{name}")
+
+    def log(self, msg: str, *args: Any, level: str = "INFO", **kwargs: Any) -> None:
+        self.backend.calls["log"] += 1
+        self.logger.log(logging.getLevelName(level), msg)
+
+    def get_main_log(self) -> logging.Logger:
+        return self.logger
+
+    def entity_exists(self, entity_id: str, **kwargs: Any) -> bool:
+        self.backend.calls["entity_exists"] += 1
+        return entity_id in self.backend.states
+
+    @future
+    async def get_state(
+        self, entity_id: Optional[str] = None, attribute: Optional[str] = None, **kwargs: Any
+    ) -> Any:
+        states = self.backend.states
+
+        if entity_id is None:
+            return {entity: dict(state) for entity, state in states.items()}
+        if "." not in entity_id:
+            return {
+                entity: dict(state)
+                for entity, state in states.items()
+                if entity.startswith(f"{entity_id}.")
+            }
+        if (state := states.get(entity_id)) is None:
+            return None
+        if attribute == "all":
+            return dict(state)
+        if attribute:
+            return state.get(attribute, state["attributes"].get(attribute))
+
+        return state["state"]
+
+    @future
+    async def set_state(self, entity_id: str, **kwargs: Any) -> None:
+        self.backend.add_entity(entity_id, kwargs.get("state"), kwargs.get("attributes"))
+
+    @future
+    async def friendly_name(self, entity_id: str, **kwargs: Any) -> str:
+        state = self.backend.states.get(entity_id, {})
+        return str(state.get("attributes", {}).get("friendly_name", entity_id))
+
+    @future
+    async def listen_state(
+        self, callback: Callable[..., Any], entity: Optional[str] = None, **kwargs: Any
+    ) -> str:
+        handle = self.backend.handle("state_")
+        self.backend.subscribe(Listener(handle, callback, entity, kwargs))
+        return handle
+
+    @future
+    async def cancel_listen_state(self, handle: str) -> None:
+        self.backend.unsubscribe(handle)
+
+    @future
+    async def listen_event(self, callback: Callable[..., Any], event: str, **kwargs: Any) -> str:
+        handle = self.backend.handle("event_")
+        self.backend.event_listeners[handle] = (callback, event, kwargs)
+        return handle
+
+    @future
+    async def cancel_listen_event(self, handle: str) -> None:
+        self.backend.event_listeners.pop(handle, None)
+
+    @future
+    async def run_in(self, callback: Callable[..., Any], delay: float, **kwargs: Any) -> str:
+        handle = self.backend.handle("timer_")
+        self.backend.timers[handle] = Timer(self.backend.now + delay, callback, kwargs, 0)
+        return handle
+
+    @future
+    async def run_every(
+        self, callback: Callable[..., Any], start: Any, interval: float, **kwargs: Any
+    ) -> str:
+        handle = self.backend.handle("timer_")
+        due = self.backend.now + (interval if start == "now" else 0)
+        self.backend.timers[handle] = Timer(due, callback, kwargs, interval)
+        return handle
+
+    @future
+    async def cancel_timer(self, handle: str) -> None:
+        self.backend.timers.pop(handle, None)
+
+    @future
+    async def call_service(self, service: str, **kwargs: Any) -> None:
+        self.backend.services.append((self.backend.now, service, kwargs))
+
+    @future
+    async def fire_event(self, event: str, **kwargs: Any) -> None:
+        await self.backend.fire_event(event, **kwargs)
+
+    @future
+    async def get_now_ts(self) -> float:
+        return self.backend.now
+
+    @future
+    async def get_now(self) -> datetime:
+        return datetime.fromtimestamp(self.backend.now, timezone.utc)
+
+    def create_task(self, coro: Awaitable[Any], **kwargs: Any) -> "asyncio.Future[Any]":
+        return asyncio.ensure_future(coro)
+
+
+def install() -> None:
+    """Register this module as `hassapi`, must run before NotiFreeze is imported."""
+    module = ModuleType("hassapi")
+    module.Hass = Hass  # type: ignore
+    sys.modules["hassapi"] = module
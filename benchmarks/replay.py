@@ -0,0 +1,165 @@
+"""NotiFreeze trace replay
+   Replays a recorded state-change trace against the fake hassapi backend on a virtual clock.
+
+    python benchmarks/replay.py trace.jsonl --config apps.yaml --set max_difference=3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import fmean, quantiles
+from time import perf_counter
+from typing import Any, Dict, List, Tuple
+
+import fake_hass
+import yaml
+
+
+fake_hass.install()
+sys.path.insert(0, str(Path(__file__).parent.parent / "apps" / "notifreeze"))
+
+import notifreeze  # noqa: E402
+
+
+def load_trace(path: Path) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split a trace into the initial snapshot and the state changes, ordered by time."""
+    snapshot: Dict[str, Dict[str, Any]] = {}
+    events: List[Dict[str, Any]] = []
+
+    with path.open() as trace:
+        for line in filter(str.strip, trace):
+            record = json.loads(line)
+            if record.get("snapshot"):
+                # the first snapshot of a trace appended by several runs wins
+                snapshot.setdefault(record["entity_id"], record)
+            else:
+                events.append(record)
+
+    return list(snapshot.values()), sorted(events, key=lambda event: event["ts"])
+
+
+def app_args(config: Path, app: str, overrides: List[str]) -> Dict[str, Any]:
+    """App arguments from an AppDaemon apps.yaml, with `key.sub=value` overrides applied."""
+    args: Dict[str, Any] = yaml.safe_load(config.read_text())[app]
+
+    for override in overrides:
+        key, _, value = override.partition("=")
+        *parents, leaf = key.split(".")
+        target = args
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = yaml.safe_load(value)
+
+    # no files are read or written next to the app during a replay
+    return {**args, "sessions": False, "cache": False, "record": False}
+
+
+def timestring(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+async def replay(
+    snapshot: List[Dict[str, Any]], events: List[Dict[str, Any]], args: Dict[str, Any], tail: float
+) -> Dict[str, Any]:
+    backend = fake_hass.Backend()
+    for record in snapshot:
+        backend.add_entity(record["entity_id"], record["state"], record.get("attributes"))
+
+    if timestamps := [record["ts"] for record in snapshot + events]:
+        backend.now = min(timestamps)
+    start = backend.now
+
+    app = notifreeze.NotiFreeze(backend, "notifreeze", args)
+    await app.initialize()
+
+    latencies: List[float] = []
+    started = perf_counter()
+
+    for event in events:
+        # fire all reminders due before the event
+        await backend.advance(max(event["ts"] - backend.now, 0))
+
+        event_started = perf_counter()
+        await backend.set(event["entity_id"], event["state"])
+        latencies.append(perf_counter() - event_started)
+
+        if len(app.outbox):
+            await app.outbox.queue.join()
+
+    # reminders still due after the last event
+    await backend.advance(tail)
+    await app.outbox.queue.join()
+
+    elapsed = perf_counter() - started
+    await app.terminate()
+
+    # inclusive, small traces are not extrapolated beyond their slowest event
+    percentiles = quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else []
+
+    return {
+        "events": len(events),
+        "span_h": round((backend.now - start) / 3600, 2),
+        "elapsed_s": round(elapsed, 3),
+        "speedup": round((backend.now - start) / elapsed) if elapsed else None,
+        "events_per_s": round(len(events) / elapsed) if elapsed else None,
+        "latency_us": {
+            "mean": round(fmean(latencies) * 1e6, 1) if latencies else None,
+            "p50": round(percentiles[49] * 1e6, 1) if percentiles else None,
+            "p99": round(percentiles[98] * 1e6, 1) if percentiles else None,
+            "max": round(max(latencies) * 1e6, 1) if latencies else None,
+        },
+        "notifications": [
+            {"ts": timestring(timestamp), "service": service, "message": data.get("message")}
+            for timestamp, service, data in backend.services
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1].strip())
+    parser.add_argument("trace", type=Path, help="trace recorded with the `record` option")
+    parser.add_argument("--config", type=Path, required=True, help="AppDaemon apps.yaml")
+    parser.add_argument("--app", default="notifreeze", help="app section in the config")
+    parser.add_argument(
+        "--set", action="append", default=[], metavar="KEY=VALUE", help="e.g. delays.initial=10"
+    )
+    parser.add_argument("--tail", type=float, default=0, help="minutes replayed after the trace")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    snapshot, events = load_trace(args.trace)
+    results = asyncio.run(
+        replay(
+            snapshot,
+            events,
+            app_args(args.config, args.app, args.set),
+            args.tail * notifreeze.SECONDS_PER_MIN,
+        )
+    )
+
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    for notification in results["notifications"]:
+        print(f"{notification['ts']}  {notification['service']}  {notification['message']}")
+
+    latency = results["latency_us"]
+    print(
+        f"\n{results['events']} events over {results['span_h']}h replayed in "
+        f"{results['elapsed_s']}s ({results['speedup']}× real time, "
+        f"{results['events_per_s']} events/s) · {len(results['notifications'])} notifications\n"
+        f"latency per event: mean {latency['mean']}µs · p50 {latency['p50']}µs · "
+        f"p99 {latency['p99']}µs · max {latency['max']}µs"
+    )
+
+
+if __name__ == "__main__":
+    main()